@@ -0,0 +1,71 @@
+import time
+
+from metrics import metrics
+from scoring import verdict_locked
+
+
+class AnalysisContext:
+    """Everything the scoring stages read and write for one request."""
+
+    def __init__(self, features, link=None, explain=False, bundle=None):
+        self.features = features
+        self.bundle = bundle  # ModelBundle (brain, tokenizer, keyword lists) pinned for this request
+        self.text = features.text
+        self.link = link
+        self.explain = explain
+        self.final_score = 0
+        self.reasons = []
+        self.ai_score = None
+        self.explanation = None
+        self.stages_run = []
+        self.stages_skipped = []
+
+    @property
+    def verdict_locked(self):
+        return verdict_locked(self.final_score)
+
+
+class Stage:
+    """
+    One scoring step. cost is a relative rank (cheapest first), not a time;
+    measured times are tracked in metrics as stage_<name>.
+    """
+
+    def __init__(self, name, cost, run):
+        self.name = name
+        self.cost = cost
+        self.run = run
+
+
+class AnalysisPipeline:
+    """
+    Runs stages cheapest-first and stops as soon as the verdict is locked
+    (a fatal rule or a fatal email verdict). Skipped stages are recorded on
+    the context and their average cost is counted as compute saved.
+    """
+
+    def __init__(self, stages):
+        self.stages = sorted(stages, key=lambda stage: stage.cost)
+
+    async def iter_stages(self, ctx):
+        """Runs the stages, yielding each stage name as soon as it has updated ctx."""
+        for stage in self.stages:
+            if ctx.verdict_locked:
+                ctx.stages_skipped.append(stage.name)
+                metrics.incr(f"stage_{stage.name}_skipped")
+                metrics.incr("stage_saved_ms", round(metrics.mean(f"stage_{stage.name}"), 3))
+                continue
+
+            start = time.perf_counter()
+            await stage.run(ctx)
+            metrics.observe(f"stage_{stage.name}", (time.perf_counter() - start) * 1000)
+            ctx.stages_run.append(stage.name)
+            yield stage.name
+
+        if ctx.stages_skipped:
+            print(f"   ⏭️ Short-circuited: skipped {', '.join(ctx.stages_skipped)} (verdict locked).")
+
+    async def run(self, ctx):
+        async for _ in self.iter_stages(ctx):
+            pass
+        return ctx
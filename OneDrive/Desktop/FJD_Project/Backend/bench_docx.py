@@ -0,0 +1,67 @@
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+import docx
+
+from docx_text import extract_docx_text
+
+# Compares the streaming DOCX extractor against python-docx on a folder of
+# real documents (e.g. offer letters): identical output, time and peak memory.
+
+
+def python_docx_text(path):
+    return " ".join([p.text for p in docx.Document(path).paragraphs])
+
+
+def streaming_text(path):
+    with open(path, "rb") as f:
+        return extract_docx_text(f)
+
+
+def measure(fn, path, repeats):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        text = fn(path)
+    elapsed = (time.perf_counter() - start) / repeats
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark DOCX text extraction.")
+    parser.add_argument("corpus", help="Folder containing .docx files")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "**", "*.docx"), recursive=True))
+    if not paths:
+        print(f"❌ No .docx files found in {args.corpus}")
+        raise SystemExit(1)
+
+    print(f"📄 DOCX EXTRACTION BENCHMARK ({len(paths)} files, {args.repeats} runs each)")
+    print("=" * 40)
+    totals = {"old_s": 0.0, "new_s": 0.0, "old_peak": 0, "new_peak": 0}
+    mismatches = 0
+    for path in paths:
+        old_text, old_s, old_peak = measure(python_docx_text, path, args.repeats)
+        new_text, new_s, new_peak = measure(streaming_text, path, args.repeats)
+        same = old_text == new_text
+        mismatches += 0 if same else 1
+        totals["old_s"] += old_s
+        totals["new_s"] += new_s
+        totals["old_peak"] = max(totals["old_peak"], old_peak)
+        totals["new_peak"] = max(totals["new_peak"], new_peak)
+        print(f"   {'✅' if same else '❌'} {os.path.basename(path)}: {len(old_text)} chars | "
+              f"python-docx {old_s * 1000:.1f}ms {old_peak / 1024:.0f}KB | "
+              f"streaming {new_s * 1000:.1f}ms {new_peak / 1024:.0f}KB")
+
+    print("=" * 40)
+    print(f"⏱️ Total time:  python-docx {totals['old_s'] * 1000:.1f}ms vs streaming {totals['new_s'] * 1000:.1f}ms "
+          f"({totals['old_s'] / max(totals['new_s'], 1e-9):.1f}x faster)")
+    print(f"💾 Peak memory: python-docx {totals['old_peak'] / 1024:.0f}KB vs streaming {totals['new_peak'] / 1024:.0f}KB")
+    print(f"🔍 Identical output: {len(paths) - mismatches}/{len(paths)}")
@@ -0,0 +1,138 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Benchmarks the pre-forked serving mode (gunicorn_conf.py) at several worker
+# counts: requests/sec on a text-only /analyze load, plus RSS and PSS per
+# process. PSS splits shared pages between the processes sharing them, so it
+# shows how much of the preloaded data (tokenizer, keyword and domain lists)
+# is actually shared; each worker loads its own brain after the fork.
+
+SAMPLE_TEXT = (
+    "Greetings from Amazon. We are hiring remote data entry operators. "
+    "Kindly deposit the refundable security fee on WhatsApp to confirm your slot. "
+    "Contact hr.hiring.team@gmail.com for the offer letter."
+)
+
+
+def read_memory_kb(pid):
+    """Returns (rss_kb, pss_kb) for a process (Linux /proc only)."""
+    rss = pss = 0
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return rss, pss
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def wait_until_up(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/ping", timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def one_request(url):
+    files = {"document": ("bench.txt", SAMPLE_TEXT.encode("utf-8"), "text/plain")}
+    start = time.perf_counter()
+    try:
+        ok = requests.post(f"{url}/analyze", files=files, timeout=60).status_code == 200
+    except requests.RequestException:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def run_load(url, concurrency, duration):
+    done = errors = 0
+    deadline = time.time() + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while time.time() < deadline:
+            for ok, _ in pool.map(lambda _: one_request(url), range(concurrency)):
+                done += 1
+                errors += 0 if ok else 1
+    return done, errors
+
+
+def bench(worker_count, port, concurrency, duration, startup_timeout):
+    env = dict(os.environ, WEB_CONCURRENCY=str(worker_count), PORT=str(port), FJD_RESULTS_STORE="off")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        if not wait_until_up(url, startup_timeout):
+            print(f"   ❌ {worker_count} worker(s): server did not start.")
+            return None
+
+        run_load(url, concurrency, 2)  # Warm-up
+        start = time.time()
+        done, errors = run_load(url, concurrency, duration)
+        elapsed = time.time() - start
+
+        workers = child_pids(server.pid)
+        memory = [read_memory_kb(pid) for pid in workers]
+        master_rss, master_pss = read_memory_kb(server.pid)
+        return {
+            "workers": worker_count,
+            "rps": done / elapsed,
+            "errors": errors,
+            "master_rss_mb": master_rss / 1024,
+            "worker_rss_mb": sum(m[0] for m in memory) / max(1, len(memory)) / 1024,
+            "worker_pss_mb": sum(m[1] for m in memory) / max(1, len(memory)) / 1024,
+            "total_pss_mb": (master_pss + sum(m[1] for m in memory)) / 1024,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput and memory per gunicorn worker count.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--port", type=int, default=10050)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per run")
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    print("🏎️ FJD WORKER BENCHMARK")
+    print("=" * 40)
+    results = []
+    for n in [int(w) for w in args.workers.split(",")]:
+        print(f"   ▶ {n} worker(s)...")
+        result = bench(n, args.port, args.concurrency, args.duration, args.startup_timeout)
+        if result:
+            results.append(result)
+
+    print(f"\n{'workers':>7} {'req/s':>8} {'errors':>7} {'master RSS':>11} {'worker RSS':>11} {'worker PSS':>11} {'total PSS':>10}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['rps']:>8.1f} {r['errors']:>7} {r['master_rss_mb']:>9.0f}MB "
+              f"{r['worker_rss_mb']:>9.0f}MB {r['worker_pss_mb']:>9.0f}MB {r['total_pss_mb']:>8.0f}MB")
@@ -1,44 +1,146 @@
+import argparse
+import csv
+import sys
+from collections import defaultdict
+
 import joblib
-import pandas as pd
+import numpy as np
+
+GRAM_SIZE = 3  # Character trigrams: "fee" -> posting list of every n-gram containing "fee"
+
+
+class FeatureIndex:
+    """
+    Character-trigram inverted index over the brain's vocabulary.
+    A lookup only verifies the few candidates that share every trigram with
+    the query, instead of scanning all 60,000 feature names.
+    """
+
+    def __init__(self, feature_names, coefs):
+        self.names = [str(name) for name in feature_names]
+        self.weights = np.asarray(coefs, dtype=np.float64)
+        self.exact = {name: i for i, name in enumerate(self.names)}
+
+        postings = defaultdict(list)
+        for i, name in enumerate(self.names):
+            for gram in self._grams(name):
+                postings[gram].append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    @staticmethod
+    def _grams(text):
+        return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
 
-# Load the brain
-try:
-    model = joblib.load("scam_model.pkl")
+    def weight(self, query):
+        """Returns the exact weight of a word/phrase, or None if unknown."""
+        i = self.exact.get(query)
+        return None if i is None else float(self.weights[i])
+
+    def related(self, query, limit=None):
+        """Returns [(ngram, weight)] containing the query, strongest first."""
+        grams = self._grams(query)
+        if grams:
+            lists = [self.postings.get(g) for g in grams]
+            if any(ids is None for ids in lists):
+                return []
+            lists.sort(key=len)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+                if candidates.size == 0:
+                    return []
+        else:
+            # Queries shorter than a trigram cannot use the index
+            candidates = np.arange(len(self.names))
+
+        hits = [i for i in candidates if query in self.names[i] and self.names[i] != query]
+        hits.sort(key=lambda i: abs(self.weights[i]), reverse=True)
+        if limit:
+            hits = hits[:limit]
+        return [(self.names[i], float(self.weights[i])) for i in hits]
+
+
+def load_index(model_path):
+    model = joblib.load(model_path)
     vectorizer = model.named_steps['tfidf']
     classifier = model.named_steps['classifier']
-except:
-    print("❌ Error: Brain not found.")
-    exit()
-
-# Get the vocabulary
-feature_names = vectorizer.get_feature_names_out()
-coefs = classifier.coef_[0]
-
-# Create a dictionary for fast lookup
-word_weights = {word: coef for word, coef in zip(feature_names, coefs)}
-
-print("\n🧠 AI BRAIN SURGEON TOOL")
-print("------------------------")
-print("Type a word or phrase to see its 'Scam Score'.")
-print("Positive (+) = SCAM  |  Negative (-) = SAFE")
-print("------------------------")
-
-while True:
-    query = input("\n🔍 Inspect Word/Phrase: ").lower().strip()
-    if query == 'exit': break
-    
-    # Check single words
-    if query in word_weights:
-        score = word_weights[query]
-        status = "🔴 SCAM TRIGGER" if score > 0 else "🟢 SAFE SIGNAL"
-        print(f"   Ref: '{query}' => Score: {score:.4f} ({status})")
+    return FeatureIndex(vectorizer.get_feature_names_out(), classifier.coef_[0])
+
+
+def status_of(score):
+    return "🔴 SCAM TRIGGER" if score > 0 else "🟢 SAFE SIGNAL"
+
+
+def run_interactive(index, max_related):
+    print("\n🧠 AI BRAIN SURGEON TOOL")
+    print("------------------------")
+    print("Type a word or phrase to see its 'Scam Score'.")
+    print("Positive (+) = SCAM  |  Negative (-) = SAFE")
+    print("------------------------")
+
+    while True:
+        query = input("\n🔍 Inspect Word/Phrase: ").lower().strip()
+        if query == 'exit': break
+
+        # Check single words
+        score = index.weight(query)
+        if score is not None:
+            print(f"   Ref: '{query}' => Score: {score:.4f} ({status_of(score)})")
+        else:
+            # Check if it's part of a known n-gram (phrase)
+            related = index.related(query)
+            for word, weight in related[:max_related or None]:
+                print(f"   Found related concept: '{word}' => {weight:.4f}")
+            if max_related and len(related) > max_related:
+                print(f"   … {len(related) - max_related} more")
+
+            if not related:
+                print("   ❌ Brain has not learned this word yet.")
+
+
+def run_batch(index, phrases_path, out_path, max_related):
+    """Reads one phrase per line and writes weight + related n-grams as CSV."""
+    with open(phrases_path, encoding='utf-8') as f:
+        phrases = [line.lower().strip() for line in f if line.strip()]
+
+    out = open(out_path, 'w', newline='', encoding='utf-8') if out_path else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["phrase", "weight", "status", "related"])
+        for phrase in phrases:
+            score = index.weight(phrase)
+            related = index.related(phrase, limit=max_related)
+            writer.writerow([
+                phrase,
+                "" if score is None else f"{score:.4f}",
+                "UNKNOWN" if score is None else ("SCAM" if score > 0 else "SAFE"),
+                "; ".join(f"{word}={weight:.4f}" for word, weight in related)
+            ])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if out_path:
+        print(f"✅ Inspected {len(phrases)} phrases -> {out_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the scam weights learned by the brain.")
+    parser.add_argument("--model", default="scam_model.pkl")
+    parser.add_argument("--batch", metavar="PHRASES_FILE", help="Non-interactive: one phrase per line")
+    parser.add_argument("--out", help="CSV output for --batch (default: stdout)")
+    parser.add_argument("--max-related", type=int, default=None,
+                        help="Related n-grams per phrase (default: all interactively, 25 with --batch; 0 = all)")
+    args = parser.parse_args()
+
+    # Load the brain
+    try:
+        index = load_index(args.model)
+    except Exception:
+        print("❌ Error: Brain not found.")
+        sys.exit(1)
+
+    if args.batch:
+        run_batch(index, args.batch, args.out, 25 if args.max_related is None else args.max_related)
     else:
-        # Check if it's part of a known n-gram (phrase)
-        found = False
-        for word in word_weights:
-            if query in word:
-                print(f"   Found related concept: '{word}' => {word_weights[word]:.4f}")
-                found = True
-        
-        if not found:
-            print("   ❌ Brain has not learned this word yet.")
\ No newline at end of file
+        run_interactive(index, args.max_related)
@@ -0,0 +1,61 @@
+import os
+import threading
+
+import numpy as np
+
+# Post-training variants of the deep brain, produced by quantize_brain.py.
+# "float32" is the original Keras .h5; the others are TFLite flatbuffers.
+VARIANT_DIR = "brain_variants"
+VARIANTS = ("float32", "float16", "int8", "int8_pruned")
+
+
+def variant_path(variant, brain_path="fjd_deep_brain.h5", directory=VARIANT_DIR):
+    if variant == "float32":
+        return brain_path
+    stem = os.path.splitext(os.path.basename(brain_path))[0]
+    return os.path.join(directory, f"{stem}.{variant}.tflite")
+
+
+class TFLiteBrain:
+    """
+    Wraps a TFLite interpreter behind the bit of the Keras API main.py uses:
+    predict(padded, batch_size=..., verbose=0) -> array of shape (n, 1).
+    One interpreter is not thread-safe, so calls are serialised.
+    """
+
+    def __init__(self, path, num_threads=None):
+        import tensorflow as tf
+
+        self.path = path
+        self.interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads or None)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = None
+        self._lock = threading.Lock()
+
+    def _run(self, batch):
+        if self._batch != len(batch):
+            self.interpreter.resize_tensor_input(self._input["index"], [len(batch), batch.shape[1]])
+            self.interpreter.allocate_tensors()
+            self._batch = len(batch)
+        self.interpreter.set_tensor(self._input["index"], batch.astype(self._input["dtype"]))
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output["index"]).copy()
+
+    def predict(self, x, batch_size=32, verbose=0):
+        x = np.asarray(x)
+        with self._lock:
+            outputs = [self._run(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        return np.concatenate(outputs, axis=0)
+
+
+def load_brain(variant, brain_path="fjd_deep_brain.h5", num_threads=None, directory=VARIANT_DIR):
+    """Loads the requested variant; float32 is the plain Keras model."""
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown brain variant '{variant}' (expected one of {', '.join(VARIANTS)})")
+    path = variant_path(variant, brain_path, directory)
+    if variant == "float32":
+        import tensorflow as tf
+        return tf.keras.models.load_model(path)
+    return TFLiteBrain(path, num_threads=num_threads)
@@ -0,0 +1,328 @@
+import os
+# Set TensorFlow log level to suppress oneDNN warnings
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+import argparse
+import glob
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from scoring import (
+    DEFAULT_KEYWORDS, MAX_LENGTH, TRUNC_TYPE, PADDING_TYPE, verdict_locked,
+    scan_for_keywords, links_to_check, email_to_validate, apply_email_score, apply_ai_score, verdict_for, quiet,
+)
+from text_features import extract_features
+
+# Offline re-scoring of an archive (CSV or Parquet) with the same rules,
+# EmailValidator, link blocklists and brain as /analyze - no HTTP, no OCR.
+# Input is streamed in chunks; each chunk is scored in a worker process
+# (one brain per process, one batched predict per chunk) and written as its
+# own part file, so an interrupted run picks up from the first missing part.
+# Unlike the API, a bulk run never degrades: a brain that fails to load or a
+# missing domain list stops it instead of writing rule-only verdicts.
+#
+#   python bulk_score.py posts.parquet --out rescored/ --text-column body --id-column post_id
+
+MANIFEST = "_manifest.json"
+
+
+def missing_domain_lists(email_validator, link_reputation):
+    """Paths of the domain lists a bulk run cannot do without (new_domains is optional, as in the API)."""
+    required = [link_reputation.scam_domains, link_reputation.shorteners,
+                email_validator.free_provider_list, email_validator.disposable_list]
+    return [os.path.abspath(s.path) for s in required if not os.path.isfile(s.path)]
+
+
+# --- WORKER SIDE ---
+class BulkScorer:
+    """Everything one worker process scores with, loaded once."""
+
+    def __init__(self, model_dir, variant, version, tf_threads, allow_missing_lists=False, expected_label=None):
+        import tensorflow as tf
+        from email_validator import EmailValidator
+        from link_reputation import LinkReputation
+        from model_registry import ModelRegistry
+
+        if tf_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+
+        registry = ModelRegistry(DEFAULT_KEYWORDS, MAX_LENGTH, directory=model_dir, variant=variant,
+                                 num_threads=tf_threads, build_explainer=False)
+        # Exactly this version: no load_initial() fallback to builtin or to no brain at all
+        bundle = registry.load(version or registry.requested_version())
+        if bundle.model is None or bundle.tokenizer is None:
+            raise RuntimeError(f"Model version '{bundle.version}' has no brain or tokenizer.")
+        if expected_label and bundle.label != expected_label:
+            raise RuntimeError(f"Model files changed since the run started: {bundle.label} != {expected_label}")
+        registry.warm_up(bundle)
+        registry.activate(bundle)
+        self.bundle = bundle
+
+        self.email_validator = EmailValidator()
+        self.link_reputation = LinkReputation()
+        missing = missing_domain_lists(self.email_validator, self.link_reputation)
+        if missing and not allow_missing_lists:
+            raise RuntimeError(f"Missing domain list(s): {', '.join(missing)}")
+
+    def score_document(self, text, link):
+        """Rules -> link -> email, cheapest first; returns (score, reasons, features)."""
+        bundle = self.bundle
+        features = extract_features(text, bundle.tokenizer)
+        score, reasons = scan_for_keywords(text, features, bundle.keywords, log=quiet)
+
+        if not verdict_locked(score):
+            for url in links_to_check(features, link):
+                link_score, link_reasons = self.link_reputation.check(url)
+                score = max(score, link_score)
+                reasons.extend(link_reasons)
+
+        if not verdict_locked(score):
+            found_email, email_features = email_to_validate(features, link)
+            if found_email:
+                email_score, email_reasons, _ = self.email_validator.validate(
+                    found_email, email_features.text, email_features)
+                score = apply_email_score(score, reasons, email_score, email_reasons, log=quiet)
+        return score, reasons, features
+
+    def score_chunk(self, ids, texts, links, batch_size):
+        from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+        bundle = self.bundle
+        scores, all_reasons, ai_scores = [], [], [None] * len(texts)
+        needs_ai = []
+        token_lists = []
+        for i, (text, link) in enumerate(zip(texts, links)):
+            score, reasons, features = self.score_document(text, link)
+            scores.append(score)
+            all_reasons.append(reasons)
+            if not verdict_locked(score) and text.strip() and bundle.model and bundle.tokenizer:
+                needs_ai.append(i)
+                token_lists.append(features.tokens)
+
+        # One batched predict for every document that still needs the brain
+        if needs_ai:
+            seq = bundle.tokenizer.texts_to_sequences(token_lists)
+            padded = pad_sequences(seq, maxlen=MAX_LENGTH, padding=PADDING_TYPE, truncating=TRUNC_TYPE)
+            predictions = bundle.model.predict(padded, batch_size=batch_size, verbose=0)[:, 0]
+            for i, prediction in zip(needs_ai, predictions):
+                ai_score = int(prediction * 100)
+                ai_scores[i] = ai_score
+                scores[i] = apply_ai_score(scores[i], all_reasons[i], ai_score, log=quiet)
+
+        labels = [verdict_for(s)[0] for s in scores]
+        return pd.DataFrame({
+            "id": ids,
+            "score": [int(s) for s in scores],
+            "label": labels,
+            "ai_score": pd.array(ai_scores, dtype="Int64"),
+            "reasons": [json.dumps(r, ensure_ascii=False) for r in all_reasons],
+            "model_version": bundle.label,
+        })
+
+
+_scorer = None
+
+
+def _init_worker(model_dir, variant, version, tf_threads, allow_missing_lists, expected_label):
+    global _scorer
+    _scorer = BulkScorer(model_dir, variant, version, tf_threads, allow_missing_lists, expected_label)
+
+
+def _score_chunk(index, ids, texts, links, batch_size):
+    start = time.perf_counter()
+    result = _scorer.score_chunk(ids, texts, links, batch_size)
+    return index, result, time.perf_counter() - start
+
+
+# --- DRIVER SIDE ---
+def iter_chunks(path, chunk_size, columns):
+    """Streams the input in chunk_size rows; only the needed columns are read."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Parquet input needs pyarrow (pip install pyarrow).")
+        parquet = pq.ParquetFile(path)
+        present = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=present):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=lambda c: c in columns)
+
+
+def part_path(out_dir, index, fmt):
+    return os.path.join(out_dir, f"part-{index:06d}.{fmt}")
+
+
+def write_part(result, out_dir, index, fmt):
+    """Tmp file + rename: a part either exists completely or not at all."""
+    path = part_path(out_dir, index, fmt)
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        result.to_parquet(tmp, index=False)
+    else:
+        result.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def load_manifest(out_dir, settings, resume):
+    """Resuming is only safe if the chunking is identical; refuse otherwise."""
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        if not resume:
+            raise SystemExit(f"❌ {out_dir} already holds a run. Pass --resume to continue it or pick a new --out.")
+        changed = [k for k in settings if previous.get(k) != settings[k]]
+        if changed:
+            raise SystemExit(f"❌ Cannot resume: {', '.join(changed)} changed since the first run.")
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(settings, f, indent=2)
+
+
+def completed_parts(out_dir, fmt):
+    done = set()
+    for path in glob.glob(os.path.join(out_dir, f"part-*.{fmt}")):
+        done.add(int(os.path.basename(path)[5:11]))
+    return done
+
+
+def check_domain_lists(allow_missing):
+    """Fails before any worker starts if a required list is missing (relative paths resolve against the cwd)."""
+    from email_validator import EmailValidator
+    from link_reputation import LinkReputation
+
+    missing = missing_domain_lists(EmailValidator(), LinkReputation())
+    if missing and not allow_missing:
+        raise SystemExit(f"❌ Missing domain list(s): {', '.join(missing)}. Run from the Backend directory, "
+                         f"set FJD_BLOCKLIST_DIR / FJD_EMAIL_LISTS_DIR, or pass --allow-missing-lists.")
+
+
+def resolve_model(model_dir, variant, version):
+    """(version, label) the workers will serve, pinned now: models/ACTIVE may move during a long run."""
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(DEFAULT_KEYWORDS, MAX_LENGTH, directory=model_dir, variant=variant)
+    version = version or registry.requested_version()
+    try:
+        return version, registry.label_of(version)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"❌ {e}")
+
+
+def run(args):
+    check_domain_lists(args.allow_missing_lists)
+    version, model_label = resolve_model(args.model_dir, args.variant, args.version)
+    fmt = args.format or ("parquet" if args.input.endswith(".parquet") else "csv")
+    # model_version is the resolved label (version@fingerprint), so resuming after
+    # models/ACTIVE or the files behind it changed is refused
+    settings = {
+        "input": os.path.abspath(args.input), "chunk_size": args.chunk_size, "format": fmt,
+        "text_column": args.text_column, "link_column": args.link_column, "id_column": args.id_column,
+        "model_version": model_label, "variant": args.variant,
+    }
+    load_manifest(args.out, settings, args.resume)
+    done = completed_parts(args.out, fmt)
+    if done:
+        print(f"   ⏩ Resuming: {len(done)} chunk(s) already scored.")
+
+    workers = args.workers
+    tf_threads = args.tf_threads or max(1, (os.cpu_count() or 1) // workers)
+    columns = [c for c in (args.text_column, args.link_column, args.id_column) if c]
+
+    print(f"🗂️ BULK SCORING {args.input} -> {args.out} with {model_label} ({workers} workers x {tf_threads} TF threads, "
+          f"chunks of {args.chunk_size}, predict batches of {args.batch_size})")
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),  # No forked TensorFlow state
+        initializer=_init_worker,
+        initargs=(args.model_dir, args.variant, version, tf_threads, args.allow_missing_lists, model_label),
+    )
+
+    start = time.perf_counter()
+    scored = skipped = 0
+    pending = set()
+
+    def collect(return_when):
+        nonlocal scored
+        finished, still_pending = wait(pending, return_when=return_when)
+        for future in finished:
+            index, result, seconds = future.result()
+            write_part(result, args.out, index, fmt)
+            scored += len(result)
+            elapsed = time.perf_counter() - start
+            print(f"   ✅ chunk {index}: {len(result)} docs in {seconds:.1f}s | "
+                  f"{scored} scored, {scored / elapsed:.0f} docs/sec overall")
+        return still_pending
+
+    try:
+        offset = 0
+        for index, chunk in enumerate(iter_chunks(args.input, args.chunk_size, columns)):
+            rows = len(chunk)
+            if index in done:
+                skipped += rows
+                offset += rows
+                continue
+            if args.text_column not in chunk:
+                raise SystemExit(f"❌ Column '{args.text_column}' not found in {args.input}.")
+            texts = chunk[args.text_column].fillna("").astype(str).tolist()
+            links = ([v.strip() or None if isinstance(v, str) else None for v in chunk[args.link_column]]
+                     if args.link_column and args.link_column in chunk else [None] * rows)
+            ids = (chunk[args.id_column].tolist() if args.id_column and args.id_column in chunk
+                   else list(range(offset, offset + rows)))
+            offset += rows
+
+            # Keep a couple of chunks queued per worker, no more: memory stays flat
+            while len(pending) >= workers * 2:
+                pending = collect(FIRST_COMPLETED)
+            pending.add(pool.submit(_score_chunk, index, ids, texts, links, args.batch_size))
+
+        while pending:
+            pending = collect(FIRST_COMPLETED)
+    except BrokenProcessPool:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise SystemExit("❌ A worker failed to start or died (see its error above). "
+                         "Finished chunks are saved; fix the cause and rerun with --resume.")
+    except KeyboardInterrupt:
+        print("\n⛔ Interrupted. Finished chunks are saved; rerun with --resume to continue.")
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise SystemExit(130)
+    pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    print("=" * 40)
+    print(f"🏁 Scored {scored} docs in {elapsed:.1f}s ({scored / max(elapsed, 1e-9):.0f} docs/sec)"
+          + (f", {skipped} already done" if skipped else ""))
+    with open(os.path.join(args.out, "_SUCCESS"), "w") as f:
+        json.dump({"scored": scored, "skipped": skipped, "seconds": round(elapsed, 2),
+                   "docs_per_sec": round(scored / max(elapsed, 1e-9), 1)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score an archive offline with the /analyze rules and brain.")
+    parser.add_argument("input", help="CSV or .parquet file")
+    parser.add_argument("--out", required=True, help="Output directory (one part file per chunk)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="Part file format (default: same as input)")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--link-column", help="Optional column with the post's link")
+    parser.add_argument("--id-column", help="Column copied to the output (default: row number)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per chunk / part file")
+    parser.add_argument("--batch-size", type=int, default=256, help="Rows per predict batch")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 1) // 2)))
+    parser.add_argument("--tf-threads", type=int, default=0, help="TensorFlow threads per worker (0 = cores / workers)")
+    parser.add_argument("--model-dir", default=os.getenv("FJD_MODEL_DIR", "models"))
+    parser.add_argument("--version", help="Model version in --model-dir (default: models/ACTIVE, else builtin)")
+    parser.add_argument("--variant", default=os.getenv("FJD_BRAIN_VARIANT", "float32"))
+    parser.add_argument("--resume", action="store_true", help="Continue a previous run in --out")
+    parser.add_argument("--allow-missing-lists", action="store_true",
+                        help="Score even if a scam/shortener/email domain list is missing (those checks never match)")
+    run(parser.parse_args())
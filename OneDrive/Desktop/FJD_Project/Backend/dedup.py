@@ -0,0 +1,189 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Exact + near-duplicate detection for the training corpus.
+# Texts are normalised, cut into character 5-gram shingles and reduced to a
+# MinHash signature; LSH banding finds candidate pairs without comparing
+# every text with every other, and candidates are confirmed by their
+# estimated Jaccard similarity. Connected candidates form one cluster.
+
+SHINGLE_SIZE = 5        # Characters per shingle (5 bytes pack into one uint64)
+NUM_PERM = 128          # MinHash permutations
+BANDS = 16              # LSH bands of NUM_PERM // BANDS rows -> ~0.7 similarity threshold
+THRESHOLD = 0.8         # Estimated Jaccard at which two texts count as duplicates
+
+
+def _mark_ranges():
+    """Combining marks (Devanagari/Tamil vowel signs, accents) as a regex class body: re's \\w omits them."""
+    ranges, start, prev = [], None, None
+    for cp in range(0x20000):  # Planes 0-1 hold every script's marks
+        if unicodedata.category(chr(cp)).startswith("M"):
+            if start is None:
+                start = cp
+            elif cp != prev + 1:
+                ranges.append((start, prev))
+                start = cp
+            prev = cp
+    ranges.append((start, prev))
+    return "".join(f"{re.escape(chr(a))}-{re.escape(chr(b))}" for a, b in ranges)
+
+
+# Everything but letters, digits and combining marks, in any script
+_NON_WORD = re.compile(rf"(?:[^\w{_mark_ranges()}]|_)+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text):
+    text = _NON_WORD.sub(" ", str(text).casefold())
+    return _SPACES.sub(" ", text).strip()
+
+
+def shingle_ids(text, k=SHINGLE_SIZE):
+    """Distinct k-byte windows of the normalised text, each packed into a uint64."""
+    data = np.frombuffer(normalize(text).encode("utf-8"), dtype=np.uint8)
+    if data.size < k:
+        data = np.pad(data, (0, k - data.size))
+    windows = np.lib.stride_tricks.sliding_window_view(data, k).astype(np.uint64)
+    packed = np.zeros(len(windows), dtype=np.uint64)
+    for i in range(k):
+        packed |= windows[:, i] << np.uint64(8 * i)
+    return np.unique(packed)
+
+
+class MinHasher:
+    """Multiply-shift hash family: h(x) = (a*x + b) >> 32 in wrapping uint64."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=42):
+        rng = np.random.default_rng(seed)
+        self.a = (rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, shingles):
+        with np.errstate(over="ignore"):
+            hashed = (shingles[np.newaxis, :] * self.a[:, np.newaxis] + self.b[:, np.newaxis]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def signatures(self, texts):
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for i, text in enumerate(texts):
+            out[i] = self.signature(shingle_ids(text))
+        return out
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, x):
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, x, y):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)  # Lowest index stays the representative
+
+
+def lsh_buckets(signatures, bands=BANDS):
+    """Yields groups of indices whose signatures agree on an entire band."""
+    rows = signatures.shape[1] // bands
+    for band in range(bands):
+        buckets = defaultdict(list)
+        chunk = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i, key in enumerate(chunk):
+            buckets[key.tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                yield members
+
+
+def estimated_jaccard(sig_a, sig_b):
+    return float(np.mean(sig_a == sig_b))
+
+
+def cluster(texts, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS, hasher=None):
+    """
+    Returns cluster_ids: cluster_ids[i] is the index of the first text in
+    i's duplicate cluster. Exact duplicates (after normalisation) always
+    share a cluster; near duplicates do when their estimated Jaccard
+    similarity reaches threshold.
+    """
+    hasher = hasher or MinHasher(num_perm)
+    normalized = [normalize(t) for t in texts]
+    uf = _UnionFind(len(texts))
+
+    # Exact duplicates first: only distinct texts get a signature. Texts that
+    # normalise to nothing (emoji, punctuation) carry no evidence of being
+    # duplicates, so each keeps its own cluster
+    first_seen = {}
+    unique_idx = []
+    for i, norm in enumerate(normalized):
+        if not norm:
+            continue
+        if norm in first_seen:
+            uf.union(first_seen[norm], i)
+        else:
+            first_seen[norm] = i
+            unique_idx.append(i)
+    signatures = hasher.signatures([normalized[i] for i in unique_idx])
+
+    # Within a bucket, each member is checked against the bucket's cluster
+    # representatives only, so a large bucket stays close to linear
+    checked = set()
+    for members in lsh_buckets(signatures, bands):
+        reps = []
+        for m in members:
+            for r in reps:
+                pair = (r, m)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if estimated_jaccard(signatures[r], signatures[m]) >= threshold:
+                    uf.union(unique_idx[r], unique_idx[m])
+                    break
+            else:
+                reps.append(m)
+
+    return np.array([uf.find(i) for i in range(len(texts))])
+
+
+def deduplicate(df, text_col="text", label_col="label", threshold=THRESHOLD):
+    """
+    Keeps one row per duplicate cluster (the first seen). Returns
+    (deduped_df, stats) where stats counts what was removed and how many
+    clusters mixed labels (same text, different answers).
+    """
+    texts = df[text_col].astype(str).tolist()
+    cluster_ids = cluster(texts, threshold)
+    normalized = [normalize(t) for t in texts]
+    exact_unique = len({n for n in normalized if n}) + normalized.count("")
+    keep = cluster_ids == np.arange(len(texts))
+
+    labels_per_cluster = pd.Series(df[label_col].to_numpy()).groupby(cluster_ids).nunique()
+    stats = {
+        "rows_before": len(texts),
+        "exact_duplicates": len(texts) - exact_unique,
+        "near_duplicates": exact_unique - int(keep.sum()),
+        "rows_after": int(keep.sum()),
+        "label_conflicts": int((labels_per_cluster > 1).sum()),
+    }
+    return df[keep].reset_index(drop=True), stats
+
+
+def cross_split_leaks(train_texts, test_texts, threshold=THRESHOLD, bands=BANDS):
+    """Share of test texts that have a near duplicate in the training set."""
+    texts = list(train_texts) + list(test_texts)
+    cluster_ids = cluster(texts, threshold, bands=bands)
+    n_train = len(train_texts)
+    # Roots are the lowest index in a cluster, so any cluster with a training member has a root < n_train
+    leaked = int(np.sum(cluster_ids[n_train:] < n_train))
+    return leaked / max(1, len(texts) - n_train)
@@ -0,0 +1,75 @@
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+# Streams the text of a .docx straight out of word/document.xml without
+# building python-docx's object model. Produces exactly what
+# " ".join(p.text for p in docx.Document(f).paragraphs) returns: body-level
+# paragraphs only, runs directly in the paragraph or in a hyperlink, with
+# tabs/breaks mapped the same way.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+BODY, P, R, HYPERLINK = W + "body", W + "p", W + "r", W + "hyperlink"
+T, TAB, PTAB, BR, CR, NO_BREAK_HYPHEN = W + "t", W + "tab", W + "ptab", W + "br", W + "cr", W + "noBreakHyphen"
+RUN_CONTENT = {T, TAB, PTAB, BR, CR, NO_BREAK_HYPHEN}
+
+
+def _run_content_text(elem):
+    tag = elem.tag
+    if tag == T:
+        return elem.text or ""
+    if tag in (TAB, PTAB):
+        return "\t"
+    if tag == CR:
+        return "\n"
+    if tag == NO_BREAK_HYPHEN:
+        return "-"
+    # w:br: only text-wrapping breaks (the default) become newlines; page/column breaks are ""
+    return "\n" if elem.get(W + "type", "textWrapping") == "textWrapping" else ""
+
+
+def _in_paragraph_run(stack):
+    # stack ends with the run: [... body, p, r] or [... body, p, hyperlink, r]
+    if len(stack) >= 3 and stack[-1] == R:
+        if stack[-2] == P and stack[-3] == BODY:
+            return True
+        if len(stack) >= 4 and stack[-2] == HYPERLINK and stack[-3] == P and stack[-4] == BODY:
+            return True
+    return False
+
+
+def iter_docx_paragraphs(file_obj):
+    """Yields the text of each body paragraph, parsing incrementally."""
+    with zipfile.ZipFile(file_obj) as archive, archive.open("word/document.xml") as xml:
+        stack = []
+        body = None
+        parts = None
+        for event, elem in iterparse(xml, events=("start", "end")):
+            if event == "start":
+                if elem.tag == BODY:
+                    body = elem
+                elif elem.tag == P and stack and stack[-1] == BODY:
+                    parts = []
+                stack.append(elem.tag)
+                continue
+
+            stack.pop()
+            if parts is not None and elem.tag in RUN_CONTENT and _in_paragraph_run(stack):
+                parts.append(_run_content_text(elem))
+            elif stack and stack[-1] == BODY:
+                if elem.tag == P:
+                    yield "".join(parts)
+                    parts = None
+                body.clear()  # Drop finished paragraphs/tables: memory stays flat
+
+
+def extract_docx_text(file_obj, max_chars=None):
+    """Paragraph texts joined by spaces, stopping once max_chars is reached."""
+    pieces = []
+    total = 0
+    for text in iter_docx_paragraphs(file_obj):
+        pieces.append(text)
+        total += len(text) + 1
+        if max_chars is not None and total >= max_chars:
+            break
+    joined = " ".join(pieces)
+    return joined[:max_chars] if max_chars is not None else joined
@@ -0,0 +1,123 @@
+import argparse
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+# A domain list is stored as a sorted array of 64-bit hashes (.npy, 8 bytes
+# per domain) and opened with mmap: millions of entries cost no parse time,
+# and every worker process shares the same page-cache pages.
+
+
+def normalize_domain(domain):
+    domain = domain.strip().lower()
+    if domain.startswith("*."):
+        domain = domain[2:]
+    return domain.strip(".")
+
+
+def hash_domain(domain):
+    return int.from_bytes(hashlib.blake2b(domain.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def domain_suffixes(host):
+    """'a.b.example.com' -> ['a.b.example.com', 'b.example.com', 'example.com', 'com']"""
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(len(labels))]
+
+
+def build_domain_set(sources, out_path):
+    """Hashes every domain in the source files (one per line, '#' comments) into out_path."""
+    hashes = []
+    for source in sources:
+        with open(source, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.split("#", 1)[0]
+                if not line.strip():
+                    continue
+                # Accept hosts-file lines too ("0.0.0.0 bad.example")
+                domain = normalize_domain(line.split()[-1])
+                if domain:
+                    hashes.append(hash_domain(domain))
+
+    array = np.unique(np.array(hashes, dtype=np.uint64))
+    # Write next to the target and rename: running workers keep their old mmap
+    tmp_path = f"{out_path}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, out_path)
+    return len(array)
+
+
+class HashedDomainSet:
+    """
+    Read-only, memory-mapped set of domains with suffix matching, so an entry
+    for 'example.com' also matches 'mail.example.com'. maybe_reload() picks
+    up a rebuilt file (checked at most every check_interval seconds) and swaps
+    it in without a restart.
+    """
+
+    def __init__(self, path, check_interval=30.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._mtime = None
+        self._checked_at = 0.0
+        self._missing_reported = False
+        self._lock = threading.Lock()
+        self.reload()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if not self._missing_reported:
+                self._missing_reported = True
+                print(f"⚠️ Domain list missing: {self.path} (lookups will not match).")
+            return False
+        if mtime == self._mtime:
+            return False
+
+        hashes = np.load(self.path, mmap_mode="r")
+        with self._lock:
+            self._hashes = hashes  # Atomic swap: lookups in flight keep the old array
+            self._mtime = mtime
+        print(f"✅ Domain list: Loaded {len(hashes)} entries from {self.path}.")
+        return True
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload()
+
+    def match(self, host):
+        """Returns the most specific listed suffix of host, or None."""
+        hashes = self._hashes
+        if not host or len(hashes) == 0:
+            return None
+        suffixes = domain_suffixes(normalize_domain(host))
+        keys = np.array([hash_domain(s) for s in suffixes], dtype=np.uint64)
+        positions = np.searchsorted(hashes, keys)
+        positions[positions == len(hashes)] = 0
+        hits = np.flatnonzero(hashes[positions] == keys)
+        return suffixes[hits[0]] if hits.size else None
+
+    def __contains__(self, host):
+        return self.match(host) is not None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a memory-mapped domain set from text lists.")
+    parser.add_argument("sources", nargs="+", help="Text files, one domain per line")
+    parser.add_argument("-o", "--out", required=True, help="Output .npy file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_domain_set(args.sources, args.out)
+    print(f"✅ Built {args.out}: {count} unique domains in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(args.out) / 1024 / 1024:.1f}MB)")
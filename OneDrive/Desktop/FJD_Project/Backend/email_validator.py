@@ -1,17 +1,29 @@
+import os
 import re
 import Levenshtein  # pip install python-Levenshtein
 import dns.resolver
 
+from domain_set import HashedDomainSet
+
+EMAIL_LISTS_DIR = os.getenv("FJD_EMAIL_LISTS_DIR", "blocklists")
+
 class EmailValidator:
-    def __init__(self):
+    def __init__(self, lists_dir=EMAIL_LISTS_DIR):
         # LAYER 1: THE FREE LOADER LIST
         # Real companies do not use these.
+        # Kept as a fallback for when the big lists below are missing.
         self.free_providers = {
             "gmail.com", "yahoo.com", "hotmail.com", "outlook.com",
             "rediffmail.com", "aol.com", "icloud.com", "protonmail.com",
             "yandex.com", "zoho.com", "mail.com", "gmx.com"
         }
 
+        # Large public free-mail / disposable lists (100k+ domains), memory-mapped
+        # and shared by every worker. Suffix matching means 'yandex.ru' also
+        # covers 'mail.yandex.ru'. Rebuilt files are picked up without a restart.
+        self.free_provider_list = HashedDomainSet(os.path.join(lists_dir, "free_email_providers.npy"))
+        self.disposable_list = HashedDomainSet(os.path.join(lists_dir, "disposable_email_domains.npy"))
+
         # LAYER 2: SCAMMER GRAMMAR (Username Patterns)
         # Real people use names (shubham.s). Scammers use titles.
         self.suspicious_keywords = [
@@ -34,11 +46,16 @@ class EmailValidator:
         except IndexError:
             return None
 
-    def _extract_company_name_from_text(self, text):
+    def _extract_company_name_from_text(self, text, features=None):
         """
         Layer 3 Helper: Tries to guess the company name from the email body.
         Looks for patterns like 'Greetings from Amazon' or 'Hiring at Google'.
         """
+        if features is not None:
+            # Already found during the shared single-pass extraction
+            candidates = features.company_candidates
+            return candidates[0].lower() if candidates else None
+
         # Regex to find "At [Company]" or "From [Company]"
         patterns = [
             r"from\s+([A-Z][a-zA-Z0-9]+)",  # Matches "from Amazon"
@@ -54,6 +71,9 @@ class EmailValidator:
         # Return the most likely company name (if found), else None
         return candidates[0].lower() if candidates else None
     
+    def _is_free_provider(self, domain):
+        return domain in self.free_providers or domain in self.free_provider_list
+
     def _check_domain_exists(self, domain):
         """Layer 4 Helper: Pings DNS to see if domain is real."""
         try:
@@ -62,10 +82,11 @@ class EmailValidator:
         except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.LifetimeTimeout):
             return False
 
-    def validate(self, email, body_text):
+    def validate(self, email, body_text, features=None):
         """
         MASTER FUNCTION: Returns (Identity Score, Reason, Verdict)
         Score starts at 100 (Trusted) and drops based on red flags.
+        Pass the request's TextFeatures to skip re-scanning body_text.
         """
         score = 100
         reasons = []
@@ -75,14 +96,25 @@ class EmailValidator:
         if not domain or not username:
             return 0, ["Invalid Email Format"], "INVALID"
 
+        self.free_provider_list.maybe_reload()
+        self.disposable_list.maybe_reload()
+        is_disposable = domain in self.disposable_list
+        # One lookup per request; every layer below reuses it
+        is_free = is_disposable or self._is_free_provider(domain)
+
         # ---------------------------------------------------------
         # 🛡️ LAYER 1: THE FREE LOADER CHECK (Instant Kill)
         # ---------------------------------------------------------
-        if domain in self.free_providers:
+        if is_disposable:
+            # Throwaway inboxes are never used for real hiring
+            score -= 100
+            reasons.append(f"Disposable/Throwaway Email Domain ({domain})")
+        elif is_free:
             # CHECK EXCEPTION: If the body mentions "Hiring" or "Job"
             # and sender is Gmail -> IT IS A SCAM.
             keywords = ["hiring", "job", "offer", "interview", "salary", "recruit"]
-            if any(k in body_text.lower() for k in keywords):
+            body_lower = features.lower if features is not None else body_text.lower()
+            if any(k in body_lower for k in keywords):
                 score -= 100
                 reasons.append(f"Corporate hiring via Free Email ({domain})")
             else:
@@ -101,16 +133,16 @@ class EmailValidator:
         if keyword_hits >= 2:
             score -= 40
             reasons.append(f"Suspicious Username Pattern ('{username}')")
-        elif keyword_hits == 1 and domain in self.free_providers:
+        elif keyword_hits == 1 and is_free:
             score -= 50 # "hr@gmail.com" -> FATAL
             reasons.append("Generic HR Title on Free Email")
 
         # ---------------------------------------------------------
         # 🔢 LAYER 3: TYPOSQUATTING (The Math Check)
         # ---------------------------------------------------------
-        claimed_company = self._extract_company_name_from_text(body_text)
+        claimed_company = self._extract_company_name_from_text(body_text, features)
         
-        if claimed_company and domain not in self.free_providers:
+        if claimed_company and not is_free:
             # Remove the .com/.net from domain to compare names
             domain_name = domain.split('.')[0]
             
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+
+class StageBusy(Exception):
+    """Raised when a stage's executor queue is full (-> 503 Retry-After)."""
+
+
+class StageExecutor:
+    """
+    A thread pool dedicated to one pipeline stage, with a bounded backlog.
+    Work beyond workers + max_queue is shed immediately instead of queueing
+    behind slow neighbours on a shared pool.
+    """
+
+    def __init__(self, name, workers, max_queue):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"fjd-{name}")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def saturated(self):
+        return self._pending >= self.workers + self.max_queue
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self.saturated():
+                metrics.incr(f"{self.name}_shed")
+                raise StageBusy(f"{self.name} queue full ({self._pending} pending)")
+            self._pending += 1
+            metrics.gauge(f"{self.name}_pending", self._pending)
+
+        submitted_at = time.perf_counter()
+
+        def timed():
+            started_at = time.perf_counter()
+            metrics.observe(f"{self.name}_queue", (started_at - submitted_at) * 1000)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(f"{self.name}_service", (time.perf_counter() - started_at) * 1000)
+
+        # Released when the thread finishes, not when the awaiting request
+        # does: a cancelled request leaves its work running, still pending
+        try:
+            future = self.pool.submit(timed)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+            metrics.gauge(f"{self.name}_pending", self._pending)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+def build_executors(ocr_workers):
+    """
+    One executor per kind of blocking work, sized for what it waits on:
+    network-bound OCR/DNS get more threads than cores, CPU-bound parsing
+    gets one per core, and TensorFlow predict (already multi-threaded
+    internally) gets very few.
+    """
+    cores = os.cpu_count() or 1
+    sizes = {
+        "ocr": (ocr_workers, ocr_workers),  # Waiting is mostly handled by the OCR pool's own queue
+        "parse": (cores, cores * 2),
+        "dns": (8, 32),
+        "predict": (2, 16),
+    }
+    executors = {}
+    for name, (workers, max_queue) in sizes.items():
+        workers = _env_int(f"FJD_{name.upper()}_WORKERS", workers)
+        max_queue = _env_int(f"FJD_{name.upper()}_QUEUE", max_queue)
+        executors[name] = StageExecutor(name, workers, max_queue)
+    return executors
+
+
+def admit(executors, stages):
+    """Admission control: refuse a request up front if any stage it needs is full."""
+    for name in stages:
+        if executors[name].saturated():
+            metrics.incr("analyze_shed")
+            raise StageBusy(f"{name} is overloaded")
@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+
+EXPLAIN_TOP_K = 10
+MAX_EXPLAIN_VOCAB = 20000  # Only the most frequent words get a saliency weight
+
+
+class TokenSaliency:
+    """
+    Per-token contribution table for the deep brain.
+    The deep brain has no linear weights to read off, so each vocabulary word is
+    scored once on its own (one batched predict) against an empty sequence.
+    After that, explaining a request is just a top-k over the token ids that
+    were already padded for scoring - no second pass over the model.
+    """
+
+    def __init__(self, model, tokenizer, max_length):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.weights = None
+        self._lock = threading.Lock()
+
+    def build(self):
+        """Scores every word once. Safe to call repeatedly; only the first call works."""
+        with self._lock:
+            if self.weights is not None:
+                return self.weights
+
+            vocab = len(self.tokenizer.word_index) + 1
+            if self.tokenizer.num_words:
+                vocab = min(vocab, self.tokenizer.num_words)
+            vocab = min(vocab, MAX_EXPLAIN_VOCAB)
+
+            # Row i = sequence holding only token i (row 0 = all padding = baseline)
+            probe = np.zeros((vocab, self.max_length), dtype=np.int32)
+            probe[:, 0] = np.arange(vocab)
+            scores = self.model.predict(probe, batch_size=1024, verbose=0)[:, 0]
+
+            weights = (scores - scores[0]).astype(np.float32)
+            weights[0] = 0.0
+            self.weights = weights
+            print(f"✅ Explainer: Scored {vocab} tokens.")
+            return weights
+
+    def explain(self, padded_row, k=EXPLAIN_TOP_K):
+        """Returns the k strongest [{"token", "weight"}] among the ids in padded_row."""
+        weights = self.weights if self.weights is not None else self.build()
+
+        ids = np.unique(padded_row)
+        ids = ids[(ids > 0) & (ids < weights.shape[0])]
+        if ids.size == 0:
+            return []
+
+        contrib = weights[ids]
+        k = min(k, ids.size)
+        top = np.argpartition(-np.abs(contrib), k - 1)[:k]
+        top = top[np.argsort(-np.abs(contrib[top]))]
+
+        index_word = self.tokenizer.index_word
+        return [
+            {"token": index_word.get(int(ids[i]), "?"), "weight": round(float(contrib[i]), 4)}
+            for i in top
+        ]
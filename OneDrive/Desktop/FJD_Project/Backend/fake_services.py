@@ -0,0 +1,93 @@
+import os
+import random
+import time
+
+# Latency-configurable stand-ins for the external services main.py talks to:
+# Gemini (OCR), DNS (MX lookups in EmailValidator) and Firestore (result
+# store). install() patches them in before main is imported - see
+# offline_app.py. Latencies are seconds, with +/- jitter as a fraction.
+
+FAKE_OCR_TEXT = (
+    "Congratulations! You have been selected for a remote data entry job at Amazon. "
+    "Kindly deposit the refundable registration fee of Rs 1999 on WhatsApp to confirm. "
+    "Contact hr.amazon.jobs@gmail.com"
+)
+
+
+def _delay(latency, jitter):
+    if latency <= 0:
+        return 0.0
+    return max(0.0, latency * (1 + random.uniform(-jitter, jitter)))
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Mimics genai.GenerativeModel.generate_content for the OCR path."""
+
+    def __init__(self, model_name, latency=0.8, jitter=0.2, error_rate=0.0, text=FAKE_OCR_TEXT):
+        self.model_name = model_name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.text = text
+
+    def generate_content(self, contents):
+        time.sleep(_delay(self.latency, self.jitter))
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError(f"Fake {self.model_name}: 503 Service Unavailable")
+        return FakeResponse(self.text)
+
+
+class FakeResolver:
+    """
+    Mimics dns.resolver.resolve for MX lookups. Domains ending in one of
+    missing_suffixes raise NXDOMAIN so the "domain does not exist" branch
+    still gets exercised.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.2, missing_suffixes=(".invalid", ".test")):
+        self.latency = latency
+        self.jitter = jitter
+        self.missing_suffixes = tuple(missing_suffixes)
+
+    def resolve(self, qname, rdtype="A", *args, **kwargs):
+        import dns.resolver
+
+        time.sleep(_delay(self.latency, self.jitter))
+        if str(qname).lower().endswith(self.missing_suffixes):
+            raise dns.resolver.NXDOMAIN()
+        return [f"10 mx.{qname}."]
+
+
+def install(gemini_latency=None, dns_latency=None, firestore_latency=None, jitter=None, gemini_error_rate=None):
+    """
+    Swaps in the fakes. Arguments default to the FJD_FAKE_* env vars so a
+    load generator can configure a server it starts as a subprocess.
+    """
+    import dns.resolver
+    import google.generativeai as genai
+
+    def env(name, default):
+        return float(os.getenv(name, default))
+
+    gemini_latency = env("FJD_FAKE_GEMINI_LATENCY", "0.8") if gemini_latency is None else gemini_latency
+    dns_latency = env("FJD_FAKE_DNS_LATENCY", "0.05") if dns_latency is None else dns_latency
+    firestore_latency = env("FJD_FAKE_FIRESTORE_LATENCY", "0.1") if firestore_latency is None else firestore_latency
+    jitter = env("FJD_FAKE_JITTER", "0.2") if jitter is None else jitter
+    gemini_error_rate = env("FJD_FAKE_GEMINI_ERROR_RATE", "0") if gemini_error_rate is None else gemini_error_rate
+
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = lambda name: FakeGeminiModel(name, gemini_latency, jitter, gemini_error_rate)
+    dns.resolver.resolve = FakeResolver(dns_latency, jitter).resolve
+
+    # main.py builds FakeFirestore(commit_latency=FJD_FAKE_FIRESTORE_LATENCY) for this store
+    os.environ["FJD_RESULTS_STORE"] = "fake"
+    os.environ["FJD_FAKE_FIRESTORE_LATENCY"] = str(firestore_latency)
+    os.environ.setdefault("GOOGLE_API_KEY", "fake-key")
+
+    print(f"🧪 Fake Services: Gemini {gemini_latency * 1000:.0f}ms (errors {gemini_error_rate:.0%}), "
+          f"DNS {dns_latency * 1000:.0f}ms, Firestore commit {firestore_latency * 1000:.0f}ms, jitter ±{jitter:.0%}.")
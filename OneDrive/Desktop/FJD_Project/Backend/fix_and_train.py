@@ -1,3 +1,6 @@
+import argparse
+import json
+import time
 import pandas as pd
 import joblib
 import random
@@ -7,6 +10,13 @@ from sklearn.feature_extraction.text import TfidfVectorizer, ENGLISH_STOP_WORDS
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
+from dedup import deduplicate, cross_split_leaks, THRESHOLD
+
+parser = argparse.ArgumentParser(description="Merge, deduplicate and train the scam classifier.")
+parser.add_argument("--no-dedup", action="store_true", help="Train on the raw merged corpus")
+parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Near-duplicate Jaccard threshold")
+parser.add_argument("--compare", action="store_true", help="Also time a fit on the raw corpus for the report")
+args = parser.parse_args()
 
 print("🧹 STARTING PHASE 11: FULL DATASET MERGE & SANITIZATION...")
 
@@ -89,6 +99,25 @@ dfs.append(df_inoculation)
 full_data = pd.concat(dfs, ignore_index=True)
 full_data = full_data.sample(frac=1).reset_index(drop=True) # Shuffle randomly
 
+raw_data = full_data
+
+# --- 4b. DEDUPLICATE (Exact + Near-Duplicates via MinHash/LSH) ---
+# Repeated texts inflate the corpus, slow training and, worse, land on both
+# sides of the split so the report card grades memorisation.
+# Deduplicating BEFORE the split means no test row has a near twin in train.
+dedup_stats = None
+if not args.no_dedup:
+    print(f"   🧬 Deduplicating (Jaccard >= {args.threshold})...")
+    start = time.time()
+    full_data, dedup_stats = deduplicate(full_data, threshold=args.threshold)
+    dedup_stats["seconds"] = round(time.time() - start, 2)
+    cut = 1 - dedup_stats["rows_after"] / max(1, dedup_stats["rows_before"])
+    print(f"   🔹 {dedup_stats['rows_before']} -> {dedup_stats['rows_after']} rows ({cut:.1%} smaller): "
+          f"{dedup_stats['exact_duplicates']} exact, {dedup_stats['near_duplicates']} near duplicates "
+          f"in {dedup_stats['seconds']}s.")
+    if dedup_stats["label_conflicts"]:
+        print(f"   ⚠️ {dedup_stats['label_conflicts']} duplicate clusters had mixed labels (kept the first row's).")
+
 print(f"🧠 TRAINING BRAIN ON {len(full_data)} CLEANED SAMPLES...")
 
 # --- 5. SMART VOCABULARY SETUP ---
@@ -112,12 +141,39 @@ pipeline = Pipeline([
 # --- 6. TRAIN & EVALUATE ---
 X_train, X_test, y_train, y_test = train_test_split(full_data['text'], full_data['label'], test_size=0.15, random_state=42)
 
+start = time.time()
 pipeline.fit(X_train, y_train)
+fit_seconds = time.time() - start
 
 print("\n📊 PHASE 11 REPORT CARD:")
 predictions = pipeline.predict(X_test)
 print(classification_report(y_test, predictions, target_names=['Safe', 'Scam']))
 
+# --- 6b. DEDUP REPORT ---
+if dedup_stats:
+    from sklearn.base import clone
+
+    print("🧬 DEDUP REPORT:")
+    report = dict(dedup_stats, fit_seconds=round(fit_seconds, 2))
+    raw_train, raw_test = train_test_split(raw_data['text'], test_size=0.15, random_state=42)
+    report["raw_split_leak_rate"] = round(cross_split_leaks(raw_train, raw_test, args.threshold), 4)
+    report["dedup_split_leak_rate"] = round(cross_split_leaks(X_train, X_test, args.threshold), 4)
+    print(f"   🔹 Test rows with a near-duplicate in train: {report['raw_split_leak_rate']:.1%} (raw split) "
+          f"-> {report['dedup_split_leak_rate']:.1%} (deduplicated split)")
+
+    if args.compare:
+        raw_y_train = raw_data['label'].loc[raw_train.index]
+        start = time.time()
+        clone(pipeline).fit(raw_train, raw_y_train)
+        report["raw_fit_seconds"] = round(time.time() - start, 2)
+        print(f"   🔹 Fit time: {report['raw_fit_seconds']}s (raw) -> {report['fit_seconds']}s (deduplicated)")
+    else:
+        print(f"   🔹 Fit time: {report['fit_seconds']}s (run with --compare to time the raw corpus too)")
+
+    with open("dedup_report.json", "w") as f:
+        json.dump(report, f, indent=2)
+    print("   💾 Saved dedup_report.json")
+
 # --- 7. SAVE ---
 joblib.dump(pipeline, "scam_model.pkl")
 print("✅ FINAL BRAIN SAVED (Prefix-Free & Inoculated).")
@@ -0,0 +1,34 @@
+# Pre-forked multi-worker serving mode:
+#   gunicorn -c gunicorn_conf.py main:app
+#
+# preload_app imports the app ONCE in the master: Python modules, the
+# tokenizer, keyword lists and the mmapped domain lists are loaded there and
+# shared copy-on-write by the forked workers. The TensorFlow runtime and the
+# brain are NOT: they start threads that do not survive fork(), so each
+# worker loads and warms its own brain in the app's lifespan (main.py,
+# load_brain_in_worker) before it accepts requests.
+import gc
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("FJD_WORKER_TIMEOUT", "120"))
+graceful_timeout = 30  # Gives the result store time to flush on shutdown
+
+# Split the cores between workers so N TensorFlow runtimes do not each grab
+# every core. Set here because this file is read before main.py is imported.
+_cores = os.cpu_count() or 1
+_per_worker = max(1, _cores // workers)
+os.environ.setdefault("FJD_TF_INTRA_THREADS", str(_per_worker))
+os.environ.setdefault("FJD_TF_INTER_THREADS", "1")
+os.environ.setdefault("OMP_NUM_THREADS", str(_per_worker))
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the GC's reach: otherwise the first
+    # collection in each worker touches every object header and un-shares
+    # the model/tokenizer pages.
+    gc.freeze()
+    server.log.info(f"FJD: tokenizer + keywords preloaded, forking {workers} worker(s) x {_per_worker} TF thread(s)")
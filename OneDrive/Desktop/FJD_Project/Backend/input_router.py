@@ -0,0 +1,138 @@
+import zipfile
+
+from metrics import metrics
+
+# Decides how an upload becomes text from its first bytes, not its filename
+# or form field: text/PDF/DOCX are extracted locally, images try local OCR
+# (Tesseract, if installed) and only go to Gemini when that finds nothing.
+
+SNIFF_BYTES = 8192
+LOCAL_OCR_MIN_WORDS = 8        # Fewer confident words than this -> fall through to Gemini
+LOCAL_OCR_MIN_CONFIDENCE = 60  # Tesseract per-word confidence (0-100)
+
+TEXT, PDF, DOCX, IMAGE, UNKNOWN = "text", "pdf", "docx", "image", "unknown"
+
+_IMAGE_SIGNATURES = (
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"\xff\xd8\xff",       # JPEG
+    b"GIF87a", b"GIF89a",
+    b"II*\x00", b"MM\x00*",  # TIFF
+)
+_ISO_IMAGE_BRANDS = (b"heic", b"heix", b"heif", b"mif1", b"avif")
+_BMP_DIB_SIZES = (12, 40, 52, 56, 64, 108, 124)  # BITMAPCOREHEADER ... BITMAPV5HEADER
+
+
+def _looks_like_bmp(head):
+    # "BM" alone also starts plain text ("BMW Group is hiring..."): check the
+    # reserved bytes and the DIB header size as well
+    return (head[:2] == b"BM" and len(head) >= 18 and head[6:10] == b"\x00\x00\x00\x00"
+            and int.from_bytes(head[14:18], "little") in _BMP_DIB_SIZES)
+
+
+def _looks_like_text(head):
+    if b"\x00" in head:
+        return False
+    try:
+        decoded = head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The sniff window may cut a multi-byte character in half
+        if e.start < len(head) - 3:
+            return False
+        decoded = head[:e.start].decode("utf-8")
+    if not decoded:
+        return False
+    printable = sum(1 for c in decoded if c.isprintable() or c in "\r\n\t")
+    return printable / len(decoded) > 0.95
+
+
+def sniff(file_obj, allow_image=True):
+    """
+    Returns TEXT, PDF, DOCX, IMAGE or UNKNOWN. Leaves the file at position 0.
+    allow_image=False re-sniffs an upload that looked like an image but
+    that PIL could not open.
+    """
+    file_obj.seek(0)
+    head = file_obj.read(SNIFF_BYTES)
+    file_obj.seek(0)
+    if not head:
+        return UNKNOWN
+
+    if head.startswith(b"%PDF-"):
+        return PDF
+    if allow_image:
+        if head.startswith(_IMAGE_SIGNATURES) or _looks_like_bmp(head):
+            return IMAGE
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return IMAGE
+        if head[4:8] == b"ftyp" and head[8:12] in _ISO_IMAGE_BRANDS:
+            return IMAGE
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(file_obj) as archive:
+                is_docx = "word/document.xml" in archive.namelist()
+        except zipfile.BadZipFile:
+            is_docx = False
+        file_obj.seek(0)
+        return DOCX if is_docx else UNKNOWN
+    if _looks_like_text(head.removeprefix(b"\xef\xbb\xbf")):
+        return TEXT
+    return UNKNOWN
+
+
+def _load_tesseract():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()  # Raises if the binary is missing
+        return pytesseract
+    except Exception:
+        return None
+
+
+class LocalOCR:
+    """
+    Optional on-box OCR for images that carry a clean text layer (chat and
+    email screenshots). Needs pytesseract + the tesseract binary; without
+    them available is False and every image goes to Gemini as before.
+    """
+
+    def __init__(self, enabled=True, min_words=LOCAL_OCR_MIN_WORDS, min_confidence=LOCAL_OCR_MIN_CONFIDENCE):
+        self.min_words = min_words
+        self.min_confidence = min_confidence
+        self._tesseract = _load_tesseract() if enabled else None
+        if enabled and self._tesseract is None:
+            print("⚠️ Local OCR: Tesseract not available (pip install pytesseract + tesseract-ocr). Using Gemini only.")
+
+    @property
+    def available(self):
+        return self._tesseract is not None
+
+    def extract(self, image):
+        """Confident words joined into lines, or "" when there are too few to trust."""
+        if not self.available:
+            return ""
+        data = self._tesseract.image_to_data(image.convert("L"), output_type=self._tesseract.Output.DICT)
+        lines = {}
+        confident = 0
+        for word, conf, block, par, line in zip(data["text"], data["conf"], data["block_num"],
+                                                data["par_num"], data["line_num"]):
+            word = word.strip()
+            if word and float(conf) >= self.min_confidence:
+                lines.setdefault((block, par, line), []).append(word)
+                confident += 1
+        if confident < self.min_words:
+            return ""
+        return "\n".join(" ".join(words) for words in lines.values())
+
+
+def record_route(kind, remote_ocr=None):
+    """
+    Counts routes per sniffed kind. For OCR candidates - anything in the
+    image field (all of which used to go to Gemini) or any image - pass
+    remote_ocr to track the share of Gemini calls avoided.
+    """
+    metrics.incr(f"route_{kind}")
+    if remote_ocr is None:
+        return
+    metrics.incr("ocr_remote" if remote_ocr else "ocr_avoided")
+    avoided = metrics.count("ocr_avoided")
+    metrics.gauge("ocr_avoided_share", round(avoided / max(1, avoided + metrics.count("ocr_remote")), 4))
@@ -0,0 +1,69 @@
+import ipaddress
+import os
+from urllib.parse import urlsplit
+
+from domain_set import HashedDomainSet
+
+BLOCKLIST_DIR = os.getenv("FJD_BLOCKLIST_DIR", "blocklists")
+
+# Built with: python domain_set.py <lists...> -o blocklists/<name>.npy
+SCAM_DOMAINS_FILE = "scam_domains.npy"
+SHORTENERS_FILE = "url_shorteners.npy"
+NEW_DOMAINS_FILE = "new_domains.npy"
+
+
+def extract_host(link):
+    """Returns the lowercase hostname of a link, tolerating a missing scheme."""
+    link = link.strip()
+    if "://" not in link:
+        link = "http://" + link
+    try:
+        return (urlsplit(link).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+class LinkReputation:
+    """Offline reputation check of a link's host against local domain lists."""
+
+    def __init__(self, directory=BLOCKLIST_DIR):
+        self.scam_domains = HashedDomainSet(os.path.join(directory, SCAM_DOMAINS_FILE))
+        self.shorteners = HashedDomainSet(os.path.join(directory, SHORTENERS_FILE))
+        self.new_domains = HashedDomainSet(os.path.join(directory, NEW_DOMAINS_FILE))
+
+    def maybe_reload(self):
+        for domain_set in (self.scam_domains, self.shorteners, self.new_domains):
+            domain_set.maybe_reload()
+
+    def check(self, link):
+        """
+        Returns (risk_score, reasons) for a link.
+        risk_score follows the rule scan scale: 100 = FATAL, 0 = nothing found.
+        """
+        host = extract_host(link)
+        if not host:
+            return 30, [f"⚠️ SUSPICIOUS LINK: Could not parse '{link}'"]
+
+        listed = self.scam_domains.match(host)
+        if listed:
+            return 100, [f"🚨 RED FLAG: Link domain '{listed}' is a known scam domain"]
+
+        score = 0
+        reasons = []
+        try:
+            ipaddress.ip_address(host)
+            score = max(score, 60)
+            reasons.append(f"⚠️ SUSPICIOUS LINK: Raw IP address '{host}' instead of a domain")
+        except ValueError:
+            pass
+
+        if self.new_domains.match(host):
+            score = max(score, 60)
+            reasons.append(f"⚠️ SUSPICIOUS LINK: Domain '{host}' was first seen recently")
+
+        shortener = self.shorteners.match(host)
+        if shortener:
+            score = max(score, 45)
+            reasons.append(f"⚠️ SUSPICIOUS LINK: URL shortener '{shortener}' hides the destination")
+
+        return score, reasons
@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import io
+import os
+import random
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+import zipfile
+
+import httpx
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Async load generator for /analyze. By default it starts offline_app.py
+# (the real app with fake Gemini/DNS/Firestore, latencies set below) and
+# fires a weighted mix of payloads at it, then reports throughput, latency
+# percentiles and error rates per scenario. Pass --url to aim it at an
+# already running server instead.
+
+SCAM_TEXT = (
+    "Greetings from Amazon. We are hiring remote data entry operators. "
+    "Kindly deposit the refundable security fee on WhatsApp to confirm your slot. "
+    "Contact hr.hiring.team@gmail.com for the offer letter."
+)
+CLEAN_TEXT = (
+    "Thank you for interviewing with Infosys. Please find your offer letter attached. "
+    "Your joining date and onboarding schedule will be shared by careers@infosys.com."
+)
+LINKS = [
+    "https://bit.ly/3xJobOffer",
+    "http://192.168.10.4/apply",
+    "https://careers.google.com/jobs/results/",
+    "https://www.amazon.jobs/en/",
+]
+DEFAULT_MIX = "screenshot=1,pdf=2,docx=2,text=4,link=1"
+
+
+# --- PAYLOADS ---
+def make_png(text):
+    """A phone-sized screenshot with the text drawn on it (readable by local OCR, if installed)."""
+    image = Image.new("RGB", (360, 640), "white")
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=16)
+    except TypeError:  # Pillow < 10.1: fixed-size bitmap font only
+        font = ImageFont.load_default()
+    draw.multiline_text((16, 24), textwrap.fill(text, width=36), fill="black", font=font, spacing=8)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_pdf(text):
+    """Smallest valid single-page PDF with one line of extractable text."""
+    safe = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    stream = f"BT /F1 10 Tf 20 400 Td ({safe}) Tj ET".encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(text):
+    """Minimal .docx: just the parts python-docx and docx_text.py need."""
+    w = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    paragraphs = "".join(f"<w:p><w:r><w:t>{sentence.strip()}.</w:t></w:r></w:p>"
+                         for sentence in text.split(".") if sentence.strip())
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'))
+        archive.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="word/document.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'))
+        archive.writestr("word/document.xml", (
+            f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{w}"><w:body>{paragraphs}</w:body></w:document>'))
+    return out.getvalue()
+
+
+def build_payloads():
+    """Pre-builds every request body once so the generator measures the server, not itself."""
+    payloads = {}
+    for name, text in (("scam", SCAM_TEXT), ("clean", CLEAN_TEXT)):
+        payloads.setdefault("screenshot", []).append({"files": {"image": ("screen.png", make_png(text), "image/png")}})
+        payloads.setdefault("pdf", []).append({"files": {"document": (f"{name}.pdf", make_pdf(text), "application/pdf")}})
+        payloads.setdefault("docx", []).append({"files": {"document": (
+            f"{name}.docx", make_docx(text),
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document")}})
+        payloads.setdefault("text", []).append({"files": {"document": (f"{name}.txt", text.encode("utf-8"), "text/plain")}})
+    payloads["link"] = [{"data": {"link": link}} for link in LINKS]
+    return payloads
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# --- LOAD ---
+class ScenarioStats:
+    def __init__(self):
+        self.latencies = []
+        self.status = {}
+        self.errors = 0
+
+    def record(self, status, latency):
+        self.latencies.append(latency)
+        self.status[status] = self.status.get(status, 0) + 1
+        if status != 200:
+            self.errors += 1
+
+
+async def worker(client, url, mix, payloads, stats, deadline, remaining):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    while time.perf_counter() < deadline:
+        if remaining is not None:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+        scenario = random.choices(names, weights)[0]
+        payload = random.choice(payloads[scenario])
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"{url}/analyze", **payload)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        stats[scenario].record(status, time.perf_counter() - start)
+
+
+async def run_load(url, mix, payloads, concurrency, duration, total_requests, timeout):
+    stats = {name: ScenarioStats() for name in mix}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    remaining = [total_requests] if total_requests else None
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + (duration if not total_requests else float("inf"))
+        await asyncio.gather(*[
+            worker(client, url, mix, payloads, stats, deadline, remaining) for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    return stats, elapsed
+
+
+def report(stats, elapsed):
+    print(f"\n{'scenario':<11} {'requests':>8} {'req/s':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}  status codes")
+    everything = ScenarioStats()
+    for name, s in list(stats.items()) + [("TOTAL", everything)]:
+        if name != "TOTAL":
+            everything.latencies += s.latencies
+            everything.errors += s.errors
+            for code, count in s.status.items():
+                everything.status[code] = everything.status.get(code, 0) + count
+        if not s.latencies:
+            print(f"{name:<11} {0:>8}")
+            continue
+        ms = np.array(s.latencies) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        codes = ", ".join(f"{code}×{count}" for code, count in sorted(s.status.items(), key=str))
+        print(f"{name:<11} {len(ms):>8} {len(ms) / elapsed:>7.1f} {p50:>7.0f}ms {p95:>7.0f}ms {p99:>7.0f}ms "
+              f"{s.errors / len(ms):>6.1%}  {codes}")
+
+
+def report_server(before, after, timers_reset):
+    """Server counters as deltas over the measured run; timers only if they were reset after warm-up."""
+    counters = {k: v - before["counters"].get(k, 0) for k, v in after.get("counters", {}).items()}
+    interesting = [k for k in sorted(counters) if counters[k] and k.startswith(("route_", "ocr_", "stage_", "analyze"))
+                   or k.endswith("_shed")]
+    if interesting:
+        print("\n🔢 Server-side counters (measured run only):")
+        for key in interesting:
+            print(f"   {key:<24} {round(counters[key], 1):>8}")
+
+    if not timers_reset:
+        print("\n⚠️ Could not reset the server's metrics, so its timers would include warm-up traffic; skipped.")
+        return
+    timers = after.get("timers", {})
+    interesting = [k for k in sorted(timers) if k.endswith(("_queue", "_service", "_commit")) or k == "analyze"]
+    if interesting:
+        print("\n⏱️ Server-side timers (ms):")
+        for key in interesting:
+            t = timers[key]
+            print(f"   {key:<18} p50 {t['p50_ms']:>8.1f}  p95 {t['p95_ms']:>8.1f}  p99 {t['p99_ms']:>8.1f}")
+
+
+# --- SERVER ---
+def start_offline_server(port, args):
+    env = dict(
+        os.environ,
+        FJD_FAKE_GEMINI_LATENCY=str(args.gemini_latency),
+        FJD_FAKE_DNS_LATENCY=str(args.dns_latency),
+        FJD_FAKE_FIRESTORE_LATENCY=str(args.firestore_latency),
+        FJD_FAKE_GEMINI_ERROR_RATE=str(args.gemini_error_rate),
+    )
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "offline_app:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+async def wait_until_up(url, timeout):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(timeout=1) as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get(f"{url}/ping")).status_code == 200:
+                    return True
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    return False
+
+
+async def fetch_metrics(url):
+    async with httpx.AsyncClient(timeout=5) as client:
+        return (await client.get(f"{url}/metrics")).json()
+
+
+async def reset_server_metrics(url, admin_token=None):
+    """POST /metrics/reset (offline app, or any server given its admin token). True if it worked."""
+    headers = {"x-admin-token": admin_token} if admin_token else {}
+    async with httpx.AsyncClient(timeout=5) as client:
+        try:
+            return (await client.post(f"{url}/metrics/reset", headers=headers)).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+
+async def main(args):
+    mix = parse_mix(args.mix)
+    payloads = build_payloads()
+    unknown = [name for name in mix if name not in payloads]
+    if unknown:
+        print(f"❌ Unknown scenario(s): {', '.join(unknown)} (expected {', '.join(payloads)})")
+        return 1
+
+    server = None
+    url = args.url
+    if not url:
+        url = f"http://127.0.0.1:{args.port}"
+        print(f"🧪 Starting offline app on {url} (Gemini {args.gemini_latency}s, DNS {args.dns_latency}s, "
+              f"Firestore {args.firestore_latency}s)...")
+        server = start_offline_server(args.port, args)
+
+    try:
+        if not await wait_until_up(url, args.startup_timeout):
+            print("❌ Server did not come up.")
+            return 1
+
+        print(f"🏋️ LOAD: {args.concurrency} concurrent clients, mix {args.mix}, "
+              + (f"{args.requests} requests" if args.requests else f"{args.duration:.0f}s"))
+        await run_load(url, mix, payloads, args.concurrency, min(args.warmup, args.duration), 0, args.timeout)
+        # Keep warm-up traffic out of the server-side numbers
+        timers_reset = await reset_server_metrics(url, args.admin_token)
+        before = await fetch_metrics(url)
+        stats, elapsed = await run_load(url, mix, payloads, args.concurrency, args.duration, args.requests, args.timeout)
+        report(stats, elapsed)
+        report_server(before, await fetch_metrics(url), timers_reset)
+        return 0
+    finally:
+        if server:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test of /analyze.")
+    parser.add_argument("--url", help="Target a running server instead of starting offline_app.py")
+    parser.add_argument("--port", type=int, default=10060)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted scenarios, e.g. 'text=4,pdf=2,screenshot=1'")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests instead")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unrecorded load first")
+    parser.add_argument("--admin-token", default=os.getenv("FJD_ADMIN_TOKEN"),
+                        help="Lets --url targets reset their metrics after warm-up")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--gemini-latency", type=float, default=0.8)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--dns-latency", type=float, default=0.05)
+    parser.add_argument("--firestore-latency", type=float, default=0.1)
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument("--server-log", help="Write the offline server's output here")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    sys.exit(asyncio.run(main(args)))
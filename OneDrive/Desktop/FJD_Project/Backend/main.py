@@ -3,18 +3,18 @@ import os
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0' 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.concurrency import run_in_threadpool # 🟢 NEW: Prevents server freezing
 import asyncio                                    # 🟢 NEW: Asynchronous time delays
-import io
-import re
-import pickle
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import hmac
+import json
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.preprocessing.sequence import pad_sequences
 from pypdf import PdfReader
-import docx
 import firebase_admin
 from firebase_admin import credentials, firestore
 import google.generativeai as genai
@@ -23,15 +23,51 @@ import time
 
 # --- CUSTOM MODULES ---
 from email_validator import EmailValidator
+from explainer import EXPLAIN_TOP_K
+from metrics import metrics
+from result_store import WriteBehindQueue, FakeFirestore
+from ocr_pool import GeminiPool, OCRBusy
+from executors import build_executors, admit, StageBusy
+from uploads import read_bounded_form, UploadTooLarge, BadUpload
+from analysis_pipeline import AnalysisPipeline, AnalysisContext, Stage
+from link_reputation import LinkReputation
+from text_features import extract_features, tokens_to_sequences
+from docx_text import extract_docx_text
+from model_registry import ModelRegistry
+from scoring import (
+    DEFAULT_KEYWORDS, MAX_LENGTH, TRUNC_TYPE, PADDING_TYPE, MAX_TEXT_LINKS,
+    scan_for_keywords, links_to_check, verdict_locked, email_to_validate, apply_email_score, apply_ai_score, verdict_for,
+)
+from input_router import sniff, record_route, LocalOCR, TEXT, PDF, DOCX, IMAGE
 
 # --- CONFIGURATION ---
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-BRAIN_PATH = "fjd_deep_brain.h5"
-TOKENIZER_PATH = "tokenizer.pickle"
-
-MAX_LENGTH = 120
-TRUNC_TYPE = 'post'
-PADDING_TYPE = 'post'
+# float32 (original .h5) | float16 | int8 | int8_pruned - built by quantize_brain.py
+BRAIN_VARIANT = os.getenv("FJD_BRAIN_VARIANT", "float32")
+# Versioned brain/tokenizer/keyword bundles (see model_registry.py); models/ACTIVE picks one
+MODEL_DIR = os.getenv("FJD_MODEL_DIR", "models")
+MODEL_CHECK_INTERVAL = float(os.getenv("FJD_MODEL_CHECK_SECONDS", "30"))
+MODEL_MIN_AGREEMENT = float(os.getenv("FJD_MODEL_MIN_AGREEMENT", "0.75"))
+ADMIN_TOKEN = os.getenv("FJD_ADMIN_TOKEN")  # Enables POST /models/activate and /metrics/reset
+METRICS_RESET_OPEN = os.getenv("FJD_METRICS_RESET_OPEN") == "1"  # No token needed (offline_app.py only)
+
+# Where verdicts are recorded: "firestore" (also honours FIRESTORE_EMULATOR_HOST), "fake" (in-process) or "off"
+RESULTS_STORE = os.getenv("FJD_RESULTS_STORE", "firestore")
+RESULTS_MAX_TEXT = 5000  # Characters of extracted text kept per result
+DOCX_MAX_CHARS = int(os.getenv("FJD_DOCX_MAX_CHARS", "200000"))  # Stop reading huge contracts here
+
+# Gemini OCR limits (per worker)
+OCR_MODELS = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash']
+OCR_CONCURRENCY = int(os.getenv("FJD_OCR_CONCURRENCY", "4"))
+OCR_MAX_WAITING = int(os.getenv("FJD_OCR_MAX_WAITING", "16"))
+OCR_WAIT_TIMEOUT = float(os.getenv("FJD_OCR_WAIT_TIMEOUT", "10"))
+# Try Tesseract on screenshots before Gemini (only if pytesseract + tesseract are installed)
+LOCAL_OCR = os.getenv("FJD_LOCAL_OCR", "on").lower() != "off"
+
+# TensorFlow threads per process (0 = TensorFlow default). gunicorn_conf.py
+# splits the cores between workers so N processes do not oversubscribe them.
+TF_INTRA_THREADS = int(os.getenv("FJD_TF_INTRA_THREADS", "0"))
+TF_INTER_THREADS = int(os.getenv("FJD_TF_INTER_THREADS", "0"))
 
 # --- INITIALIZATION LOGS ---
 print("\n" + "="*40)
@@ -46,7 +82,24 @@ if not firebase_admin._apps:
         print("✅ Firebase: Connected.")
     except Exception as e:
         print(f"❌ Firebase Error: {e}")
-db = firestore.client()
+
+db = None  # "off": no client at all, so the app starts without Firebase credentials
+if RESULTS_STORE == "fake":
+    db = FakeFirestore(commit_latency=float(os.getenv("FJD_FAKE_FIRESTORE_LATENCY", "0")))
+    print("🧪 Result Store: Using in-process fake Firestore.")
+elif RESULTS_STORE == "firestore":
+    db = firestore.client()
+
+result_queue = None
+if db is not None:
+    result_queue = WriteBehindQueue(
+        db,
+        max_batch=int(os.getenv("FJD_RESULTS_BATCH", "200")),
+        flush_interval=float(os.getenv("FJD_RESULTS_FLUSH_SECONDS", "2.0")),
+        max_queue=int(os.getenv("FJD_RESULTS_MAX_QUEUE", "5000")),
+        drop_policy=os.getenv("FJD_RESULTS_DROP_POLICY", "drop_oldest"),
+    )
+    print(f"✅ Result Store: Write-behind queue ready ({RESULTS_STORE}).")
 
 # Initialize Gemini (THE OCR ENGINE)
 if GOOGLE_API_KEY:
@@ -55,27 +108,86 @@ if GOOGLE_API_KEY:
 else:
     print("❌ CRITICAL: GOOGLE_API_KEY not found. OCR will fail.")
 
+# One long-lived client per model, shared by every request
+ocr_pool = GeminiPool(
+    OCR_MODELS, genai.GenerativeModel,
+    max_concurrency=OCR_CONCURRENCY, max_waiting=OCR_MAX_WAITING, wait_timeout=OCR_WAIT_TIMEOUT
+)
+
+# Separate bounded pools per stage so slow OCR cannot starve DNS or predict
+executors = build_executors(OCR_CONCURRENCY)
+RETRY_AFTER_SECONDS = os.getenv("FJD_RETRY_AFTER", "5")
+
 # Initialize Tools
-try:
-    model = tf.keras.models.load_model(BRAIN_PATH)
-    print(f"✅ Deep Brain: Loaded ({BRAIN_PATH}).")
-except Exception as e:
-    print(f"❌ CRITICAL: Brain Load Failed: {e}")
-    model = None
-
-try:
-    with open(TOKENIZER_PATH, 'rb') as handle:
-        tokenizer = pickle.load(handle)
-    print(f"✅ Tokenizer: Loaded ({TOKENIZER_PATH}).")
-except Exception as e:
-    print(f"❌ CRITICAL: Tokenizer Load Failed: {e}")
-    tokenizer = None
+# Brain + tokenizer + keyword lists live in one versioned bundle that can be
+# swapped at runtime; requests keep the bundle they started with. Only the
+# tokenizer and keyword lists load here (possibly in gunicorn's pre-fork
+# master); the brain loads per worker in lifespan, see load_brain_in_worker
+model_registry = ModelRegistry(
+    DEFAULT_KEYWORDS, MAX_LENGTH, directory=MODEL_DIR, variant=BRAIN_VARIANT,
+    num_threads=TF_INTRA_THREADS, check_interval=MODEL_CHECK_INTERVAL, min_agreement=MODEL_MIN_AGREEMENT
+)
+model_registry.preload()
 
 email_validator = EmailValidator()
 print("✅ Email Validator: Ready.")
+
+link_reputation = LinkReputation()
+print("✅ Link Reputation: Ready.")
+
+local_ocr = LocalOCR(enabled=LOCAL_OCR)
+if local_ocr.available:
+    print("✅ Local OCR: Tesseract ready (Gemini only when it finds nothing).")
 print("="*40 + "\n")
 
-app = FastAPI()
+def load_brain_in_worker():
+    """
+    Starts the TensorFlow runtime, loads the brain and warms it up. Runs in
+    each worker after the fork: TensorFlow's thread pools do not survive
+    fork(), so none of this may happen in a preloading master.
+    """
+    # Must happen before the first TensorFlow op (the model load below)
+    if TF_INTRA_THREADS:
+        tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_THREADS)
+    if TF_INTER_THREADS:
+        tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_THREADS)
+    bundle = model_registry.load_initial()
+    print(f"✅ Deep Brain: Serving {bundle.label} ({BRAIN_VARIANT}) in worker {os.getpid()}.")
+
+@asynccontextmanager
+async def lifespan(app):
+    # The brain and the writer thread start per worker process, after any fork
+    load_brain_in_worker()
+    if result_queue:
+        result_queue.start()
+    yield
+    if result_queue:
+        result_queue.stop()
+    for executor in executors.values():
+        executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(StageBusy)
+@app.exception_handler(OCRBusy)
+async def overloaded_handler(request, exc):
+    """Load shedding: tell the client to come back instead of queueing forever."""
+    print(f"⛔ OVERLOADED: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly."},
+        headers={"Retry-After": RETRY_AFTER_SECONDS},
+    )
+
+@app.exception_handler(UploadTooLarge)
+async def too_large_handler(request, exc):
+    print(f"⛔ UPLOAD REJECTED: {exc}")
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+@app.exception_handler(BadUpload)
+async def bad_upload_handler(request, exc):
+    print(f"⛔ BAD UPLOAD: {exc}")
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
 
 app.add_middleware(
     CORSMiddleware,
@@ -85,50 +197,86 @@ app.add_middleware(
     allow_headers=["*"],  
 )
 
-# 🛑 FATAL KEYWORDS (The "Hard Kill" List)
-FATAL_KEYWORDS = [
-    r"kindly\s+deposit", r"send\s+a\s+check", r"purchase\s+equipment",
-    r"buy\s+from\s+vendor", r"western\s+union", r"moneygram",
-    r"clearance\s+fee", r"refundable\s+deposit", r"cost\s+of\s+training"
-]
-
-# ⚠️ SUSPICIOUS KEYWORDS (The "Yellow Flag" List)
-SUSPICIOUS_KEYWORDS = [
-    r"telegram", r"whatsapp", r"signal\s+app", r"verify\s+your\s+identity",
-    r"upload\s+id", r"ssn", r"crypto", r"bitcoin", r"wallet\s+address"
-]
-
-# ✅ WHITELIST (The "Safe Harbor" List)
-WHITELIST_CONTEXT = [
-    "checkr", "sterling", "hireright", "id.me",
-    "background check", "pre-employment screening"
-]
-
 # --- WAKE UP ENDPOINT (NEW) ---
 @app.get("/ping")
 def ping_server():
     """Lightweight endpoint to wake up the Render server from cold start."""
     return {"status": "awake", "time": time.strftime('%H:%M:%S')}
 
+@app.get("/metrics")
+def get_metrics():
+    """Counters and latency percentiles for this worker."""
+    return dict(metrics.snapshot(), model_version=model_registry.active.label)
+
+def is_admin(request):
+    """Constant-time check of the x-admin-token header; always False when no token is configured."""
+    if not ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get("x-admin-token", "")
+    return hmac.compare_digest(supplied.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+@app.post("/metrics/reset")
+def reset_metrics(request: Request):
+    """Clears this worker's counters and timers, e.g. between a load test's warm-up and its measured run."""
+    if not METRICS_RESET_OPEN and not is_admin(request):
+        return JSONResponse(status_code=403, content={"detail": "Metrics reset is disabled or the token is wrong."})
+    metrics.reset()
+    return {"status": "reset"}
+
+# --- MODEL VERSIONS ---
+@app.get("/models")
+def get_models():
+    """Live and requested model version of this worker, plus any failed swap."""
+    return model_registry.status()
+
+@app.post("/models/activate")
+async def activate_model(request: Request):
+    """
+    Points every worker at a version in models/ (each one loads, warms up
+    and parity-checks it in the background before swapping).
+    """
+    if not is_admin(request):
+        return JSONResponse(status_code=403, content={"detail": "Model activation is disabled or the token is wrong."})
+    try:
+        version = str((await request.json()).get("version", "")).strip()
+    except (ValueError, AttributeError):
+        version = ""
+    if not version:
+        return JSONResponse(status_code=400, content={"detail": 'Send {"version": "<name in models/>"}.'})
+    try:
+        model_registry.publish(version)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+    except FileNotFoundError as e:
+        return JSONResponse(status_code=404, content={"detail": str(e)})
+    model_registry.maybe_reload()
+    return JSONResponse(status_code=202, content=model_registry.status())
+
 # --- HELPER FUNCTIONS ---
 
-def extract_text_from_file(file_bytes, filename):
+def extract_text_from_file(file_obj, filename, kind=None):
+    """
+    Parses straight from the spooled upload - no extra bytes copy.
+    kind is the sniffed content type; without it the extension decides.
+    """
     try:
         print(f"📄 Processing Document: {filename}")
-        if filename.endswith(".pdf"):
-            reader = PdfReader(io.BytesIO(file_bytes))
+        if kind is None:
+            kind = {".pdf": PDF, ".docx": DOCX, ".txt": TEXT}.get(os.path.splitext(filename.lower())[1])
+        if kind == PDF:
+            reader = PdfReader(file_obj)
             text = ""
             for page in reader.pages:
                 text += page.extract_text() + " "
             print(f"   -> Extracted {len(text)} characters from PDF.")
             return text
-        elif filename.endswith(".docx"):
-            doc = docx.Document(io.BytesIO(file_bytes))
-            text = " ".join([p.text for p in doc.paragraphs])
+        elif kind == DOCX:
+            # Streams word/document.xml instead of building the python-docx object model
+            text = extract_docx_text(file_obj, max_chars=DOCX_MAX_CHARS)
             print(f"   -> Extracted {len(text)} characters from DOCX.")
             return text
-        elif filename.endswith(".txt"):
-            text = file_bytes.decode('utf-8')
+        elif kind == TEXT:
+            text = file_obj.read().decode('utf-8-sig')
             print(f"   -> Extracted {len(text)} characters from TXT.")
             return text
         else:
@@ -138,189 +286,412 @@ def extract_text_from_file(file_bytes, filename):
         print(f"❌ Document Extraction Failed: {e}")
         return ""
 
-async def perform_ocr_with_gemini(image_bytes): # 🟢 NEW: Now Async
+async def perform_ocr_with_gemini(image_file): # 🟢 NEW: Now Async
     print("👁️ INITIATING GEMINI OCR PROTOCOL...")
-    image = Image.open(io.BytesIO(image_bytes))
+    image_file.seek(0)
+    try:
+        image = Image.open(image_file)
+    except Exception as e:
+        print(f"❌ OCR: Could not read image: {e}")
+        return ""
     prompt = "Extract all readable text from this image exactly as it appears. Do not summarize."
     
-    models_to_try = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash']
-    
-    for model_name in models_to_try:
-        try:
-            print(f"   Attempting OCR with: {model_name}...")
-            model = genai.GenerativeModel(model_name)
-            
-            # 🟢 NEW: Push network call to background thread to avoid freezing
-            response = await run_in_threadpool(model.generate_content, [prompt, image])
-            
-            if response.text:
-                print(f"✅ OCR SUCCESS ({model_name}). Extracted {len(response.text)} characters.")
-                return response.text
-            else:
-                 print(f"⚠️ OCR finished but returned empty text with {model_name}.")
-
-        except Exception as e:
-            print(f"❌ OCR FAILED with {model_name}: {e}")
-            print("   Adding small delay before retry...")
-            await asyncio.sleep(1) # 🟢 NEW: Non-blocking sleep
+    # Raises OCRBusy (-> 503) instead of piling up on the OCR executor
+    async with ocr_pool.slot() as clients:
+        for model_name in OCR_MODELS:
+            try:
+                print(f"   Attempting OCR with: {model_name}...")
+                model = clients[model_name]
+
+                # 🟢 NEW: Push network call to background thread to avoid freezing
+                response = await executors["ocr"].run(model.generate_content, [prompt, image])
+
+                if response.text:
+                    print(f"✅ OCR SUCCESS ({model_name}). Extracted {len(response.text)} characters.")
+                    return response.text
+                else:
+                     print(f"⚠️ OCR finished but returned empty text with {model_name}.")
+
+            except Exception as e:
+                print(f"❌ OCR FAILED with {model_name}: {e}")
+                print("   Adding small delay before retry...")
+                await asyncio.sleep(1) # 🟢 NEW: Non-blocking sleep
 
     print("❌❌ ALL GEMINI OCR ATTEMPTS FAILED.")
     return ""
 
-def scan_for_keywords(text):
-    print("🔎 Running Rule-Based Keyword Scan...")
-    text = text.lower()
-    triggers = []
-    risk_score = 0
-    
-    is_whitelisted = any(safe in text for safe in WHITELIST_CONTEXT)
-    if is_whitelisted:
-        print("   🛡️ Whitelist Active: Ignoring specific suspicious triggers.")
-
-    for pattern in FATAL_KEYWORDS:
-        if re.search(pattern, text):
-            found = pattern.replace(r'', '').strip()
-            print(f"🚨 FATAL TRIGGER FOUND: '{found}'")
-            triggers.append(f"🚨 RED FLAG: Found '{found}'")
-            return 100, triggers 
-
-    for pattern in SUSPICIOUS_KEYWORDS:
-        if re.search(pattern, text):
-            if "verify" in pattern and is_whitelisted:
-                continue 
-            
-            found = pattern.replace(r'', '').strip()
-            print(f"⚠️ SUSPICIOUS TRIGGER FOUND: '{found}'")
-            triggers.append(f"⚠️ SUSPICIOUS: Found '{found}'")
-            risk_score += 30
-
-    score = min(risk_score, 90)
-    print(f"   -> Rule-Based Score: {score}/100")
-    return score, triggers
-
-# --- API ENDPOINT ---
+def local_image_text(image_file):
+    """Tesseract pass over a screenshot; "" if it is unavailable or not confident."""
+    image_file.seek(0)
+    try:
+        with Image.open(image_file) as image:
+            return local_ocr.extract(image)
+    except Exception as e:
+        print(f"⚠️ Local OCR Failed: {e}")
+        return ""
 
-@app.post("/analyze")
-async def analyze_evidence(
-    image: UploadFile = File(None),       
-    link: str = Form(None),
-    document: UploadFile = File(None)
-):
-    print("\n" + "="*40)
-    print(f"🚀 NEW ANALYSIS REQUEST RECEIVED AT {time.strftime('%H:%M:%S')}")
-    print("="*40)
-    
-    final_score = 0
-    reasons = []
-    combined_text = ""
+def opens_as_image(image_file):
+    """PIL can parse the header. Only reads the first few bytes; leaves the file at 0."""
+    image_file.seek(0)
+    try:
+        with Image.open(image_file):
+            return True
+    except Exception:
+        return False
+    finally:
+        image_file.seek(0)
+
+async def upload_to_text(upload, field):
+    """
+    Routes an upload by its magic bytes, whatever the field or filename says:
+    text/PDF/DOCX are parsed locally, images try local OCR first and reach
+    Gemini only when that yields nothing. Returns (text, reason).
+    """
+    kind = sniff(upload.file)
+    not_an_image = kind == IMAGE and not await executors["parse"].run(opens_as_image, upload.file)
+    if not_an_image:
+        # Image magic bytes PIL cannot open: sniff again as a document, else trust the extension
+        kind = sniff(upload.file, allow_image=False)
+        print(f"   ⚠️ '{upload.filename}' is not a readable image.")
+    print(f"   🧭 Routed '{upload.filename}' ({field} field) as {kind}.")
+    ocr_candidate = field == "image" or kind == IMAGE
+
+    if kind == IMAGE:
+        if local_ocr.available:
+            text = await executors["parse"].run(local_image_text, upload.file)
+            if text.strip():
+                print(f"✅ LOCAL OCR: Extracted {len(text)} characters (Gemini skipped).")
+                record_route(kind, remote_ocr=False)
+                return text, "✅ Extracted text from screenshot on-device."
+        record_route(kind, remote_ocr=True)
+        text = await perform_ocr_with_gemini(upload.file) # 🟢 NEW: Added await
+        return text, "✅ OCR successfully extracted text from screenshot."
+
+    if kind in (TEXT, PDF, DOCX) or field == "document" or not_an_image:
+        # 🟢 NEW: Run heavy document parsing in background
+        known = kind if kind in (TEXT, PDF, DOCX) else None  # Unknown bytes in the document field: trust the extension
+        text = await executors["parse"].run(extract_text_from_file, upload.file, upload.filename, known)
+        record_route(kind, remote_ocr=False if ocr_candidate else None)
+        return text, f"✅ Extracted text from document: {upload.filename}"
 
-    # --- STEP 1: PROCESS SCREENSHOT ---
-    if image:                             
-        print("\n[INPUT 1] Processing Screenshot...")
-        content = await image.read()      
-        ocr_text = await perform_ocr_with_gemini(content) # 🟢 NEW: Added await
-        if ocr_text:
-            combined_text += ocr_text + " "
-            reasons.append("✅ OCR successfully extracted text from screenshot.")
-    else:
-        print("\n[INPUT 1] No Screenshot provided.")
+    print(f"⚠️ Unsupported upload in the {field} field: {upload.filename}")
+    record_route(kind, remote_ocr=False)
+    return "", ""
 
-    # --- STEP 2: PROCESS DOCUMENT ---
-    if document:
-        print("\n[INPUT 3] Processing Document...")
-        content = await document.read()
-        # 🟢 NEW: Run heavy document parsing in background
-        doc_text = await run_in_threadpool(extract_text_from_file, content, document.filename)
-        if doc_text:
-            combined_text += doc_text + " "
-            reasons.append(f"✅ Extracted text from document: {document.filename}")
-    else:
-        print("\n[INPUT 3] No Document provided.")
+# --- SCORING STAGES ---
 
-    # --- STEP 3: RULE-BASED ANALYSIS ---
+async def rules_stage(ctx):
     print("\n[ANALYSIS] Starting Rule-Based Scan...")
-    kw_score, kw_reasons = scan_for_keywords(combined_text)
-    final_score = max(final_score, kw_score)
-    reasons.extend(kw_reasons)
-
-    # --- STEP 4: PROCESS LINK & EMAIL ---
-    print("\n[INPUT 2] Processing Link & Emails...")
-    if link:
+    kw_score, kw_reasons = scan_for_keywords(ctx.text, ctx.features, ctx.bundle.keywords)
+    ctx.final_score = max(ctx.final_score, kw_score)
+    ctx.reasons.extend(kw_reasons)
+
+async def link_stage(ctx):
+    print("\n[INPUT 2] Processing Links...")
+    # The link field plus URLs already found in the extracted text
+    links = links_to_check(ctx.features, ctx.link)
+    if not links:
+        print("   ℹ️ No links provided or found in text.")
+        return
+
+    link_reputation.maybe_reload()  # Picks up rebuilt blocklists without a restart
+    for link in links:
         print(f"   🔗 Analyzing Link: {link}")
+        link_score, link_reasons = link_reputation.check(link)
+        print(f"   -> Link Risk Score: {link_score}/100")
+        ctx.final_score = max(ctx.final_score, link_score)
+        ctx.reasons.extend(link_reasons)
 
-    email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', combined_text)
-    if email_match:
-        found_email = email_match.group(0)
+async def email_stage(ctx):
+    print("\n[INPUT 2] Processing Emails...")
+    found_email, features = email_to_validate(ctx.features, ctx.link)
+
+    if found_email:
         print(f"   📧 Found Email Address: {found_email}")
-        
-        validation_context = combined_text
-        if link:
-            validation_context += f" Link provided: {link}"
 
         # 🟢 NEW: Run DNS blocking checks in background thread
-        email_score, email_reasons, _ = await run_in_threadpool(email_validator.validate, found_email, validation_context)
+        email_score, email_reasons, _ = await executors["dns"].run(email_validator.validate, found_email, features.text, features)
         print(f"   -> Validator Score: {email_score}/100")
-        
-        if email_score == 0:
-            final_score = max(final_score, 100)
-            reasons.extend(email_reasons)
-            print("   🚨 Email Validator triggered FATAL score.")
-        elif email_score < 50:
-            final_score = max(final_score, 75)
-            reasons.extend(email_reasons)
-        else:
-            reasons.extend(email_reasons)
+        ctx.final_score = apply_email_score(ctx.final_score, ctx.reasons, email_score, email_reasons)
     else:
         print("   ℹ️ No email addresses found in text.")
 
-    # --- STEP 5: AI BRAIN ANALYSIS ---
+async def ai_stage(ctx):
     print("\n[ANALYSIS] Starting AI Brain Analysis...")
-    if model and tokenizer and combined_text.strip():
-        seq = tokenizer.texts_to_sequences([combined_text])
+    model, tokenizer, explainer = ctx.bundle.model, ctx.bundle.tokenizer, ctx.bundle.explainer
+    if model and tokenizer and ctx.text.strip():
+        seq = tokens_to_sequences(tokenizer, ctx.features)
         padded = pad_sequences(seq, maxlen=MAX_LENGTH, padding=PADDING_TYPE, truncating=TRUNC_TYPE)
         
         # 🟢 NEW: Run TensorFlow prediction in background to avoid freezing
-        prediction_output = await run_in_threadpool(model.predict, padded, verbose=0)
+        predict_start = time.perf_counter()
+        prediction_output = await executors["predict"].run(model.predict, padded, verbose=0)
+        metrics.observe("predict", (time.perf_counter() - predict_start) * 1000)
         prediction = prediction_output[0][0]
         ai_score = int(prediction * 100)
+        ctx.ai_score = ai_score
         print(f"🧠 AI RAW SCORE: {ai_score}%")
 
-        if final_score >= 100:
-            print("   -> Ignored AI score (Rule-Based FATAL trigger active).")
-        elif ai_score > 90:
-            final_score = max(final_score, 95)
-            reasons.append("🤖 AI Model detected high-risk scam patterns.")
-            print("   -> AI boosted score to High Risk.")
-        elif ai_score < 10:
-            if final_score < 50: 
-                final_score = 5 
-                reasons.append("✅ AI Context Analysis: Safe corporate language detected.")
-                print("   -> AI lowered score (Safe Context).")
-            else:
-                 print("   -> AI score low, but existing suspicious rules prevent Safe verdict.")
+        if ctx.explain and explainer:
+            # Reuses the padded ids from scoring: one top-k, no second model pass
+            explain_start = time.perf_counter()
+            if explainer.weights is None:  # Only if warm-up could not build it; counted in latency_ms
+                await executors["predict"].run(explainer.build)
+            top_tokens = explainer.explain(padded[0], EXPLAIN_TOP_K)
+            explain_ms = (time.perf_counter() - explain_start) * 1000
+            metrics.observe("explain", explain_ms)
+            ctx.explanation = {"ai_score": ai_score, "top_tokens": top_tokens, "latency_ms": round(explain_ms, 3)}
+            print(f"   🔬 Explanation: {len(top_tokens)} tokens in {explain_ms:.2f}ms")
+
+        ctx.final_score = apply_ai_score(ctx.final_score, ctx.reasons, ai_score)
     else:
         print("⚠️ Skipping AI analysis (Brain offline or empty text).")
 
+# Cost ranks: regex scan (µs) < hashed blocklist lookups (µs) < email regex + possible DNS (ms)
+# < TensorFlow predict (10s of ms)
+analysis_pipeline = AnalysisPipeline([
+    Stage("rules", 1, rules_stage),
+    Stage("link", 2, link_stage),
+    Stage("email", 10, email_stage),
+    Stage("ai", 100, ai_stage),
+])
+
+# --- API ENDPOINT ---
+
+async def bounded_form(request: Request):
+    """
+    Streams the upload into spooled temp files under per-field/per-request
+    byte caps (413 as soon as one is crossed). Files are closed after the response.
+    """
+    # Reject up front (503) rather than let every request slow down together
+    admit(executors, ["dns", "predict"])
+    form = await read_bounded_form(request)
+    try:
+        yield form
+    finally:
+        form.close()
+
+def read_request_fields(form):
+    image = form.files.get("image")
+    document = form.files.get("document")
+    link = form.fields.get("link") or None
+    explain = form.fields.get("explain", "").strip().lower() in ("1", "true", "yes", "on")
+    return image, document, link, explain
+
+async def iter_inputs(image, document):
+    """
+    Yields (input, text, reason) as each uploaded input is turned into text.
+    Screenshot and document are converted concurrently, so a document is not
+    stuck behind a slow OCR call; closing the generator early cancels
+    whatever is still running.
+    """
+    async def convert(name, upload):
+        text, reason = await upload_to_text(upload, name)
+        return name, text, reason
+
+    tasks = []
+    # --- STEP 1: PROCESS SCREENSHOT ---
+    if image:
+        print("\n[INPUT 1] Processing Screenshot...")
+        tasks.append(asyncio.create_task(convert("image", image)))
+    else:
+        print("\n[INPUT 1] No Screenshot provided.")
+
+    # --- STEP 2: PROCESS DOCUMENT ---
+    if document:
+        print("\n[INPUT 3] Processing Document...")
+        tasks.append(asyncio.create_task(convert("document", document)))
+    else:
+        print("\n[INPUT 3] No Document provided.")
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def combine_inputs(results):
+    """Screenshot text first, then the document, whichever finished first: the brain sees a stable order."""
+    combined_text = ""
+    reasons = []
+    for name in ("image", "document"):
+        text, reason = results.get(name, ("", ""))
+        if text:
+            combined_text += text + " "
+            reasons.append(reason)
+    return combined_text, reasons
+
+def finalize_report(ctx, input_reasons, combined_text, image, document, request_start):
     # --- STEP 6: FINAL VERDICT ---
     print("\n[FINALIZING] Generating Report...")
-    
-    if final_score > 80:
-        label = "HIGH RISK"
-        color = "RED"
-    elif final_score > 40:
-        label = "MODERATE"
-        color = "YELLOW"
-    else:
-        label = "SAFE JOB"
-        color = "GREEN"
+    final_score = ctx.final_score
+    reasons = input_reasons + ctx.reasons
+    label, color = verdict_for(final_score)
 
     print(f"🏁 FINAL SCORE: {final_score} | VERDICT: {label}")
     print("="*40 + "\n")
+    metrics.observe("analyze", (time.perf_counter() - request_start) * 1000)
 
-    return {
+    result = {
         "score": int(final_score),       
         "label": label,                  
         "color": color,                  
         "reasons": reasons,              
-        "extracted_text": combined_text[:200] + "..." if combined_text else "No readable text found." 
-    }
\ No newline at end of file
+        "extracted_text": combined_text[:200] + "..." if combined_text else "No readable text found.",
+        "model_version": ctx.bundle.label,
+    }
+    if ctx.stages_skipped:
+        result["skipped_stages"] = ctx.stages_skipped
+    if ctx.explain:
+        result["explanation"] = ctx.explanation
+
+    if result_queue:
+        # Non-blocking: the write-behind thread commits it with the next batch
+        features = ctx.features
+        result_queue.submit({
+            "created_at": datetime.now(timezone.utc),
+            "score": result["score"],
+            "label": label,
+            "reasons": reasons,
+            "text": combined_text[:RESULTS_MAX_TEXT],
+            "link": ctx.link,
+            "emails": features.emails[:5],
+            "urls": features.urls[:MAX_TEXT_LINKS],
+            "phones": features.phones[:5],
+            "has_image": bool(image),
+            "has_document": bool(document),
+            "model_version": ctx.bundle.label,
+        })
+    return result
+
+@app.post("/analyze")
+async def analyze_evidence(form = Depends(bounded_form)):
+    request_start = time.perf_counter()
+    image, document, link, explain = read_request_fields(form)
+    if document or image:
+        admit(executors, ["parse"])  # Documents, and screenshots that turn out to be text/PDF, parse locally
+    model_registry.maybe_reload()
+    bundle = model_registry.active  # This request finishes on this version even if a swap lands mid-flight
+    print("\n" + "="*40)
+    print(f"🚀 NEW ANALYSIS REQUEST RECEIVED AT {time.strftime('%H:%M:%S')}")
+    print("="*40)
+    
+    # --- STEPS 1-2: TURN INPUTS INTO TEXT ---
+    results = {}
+    async for name, text, reason in iter_inputs(image, document):
+        results[name] = (text, reason)
+    combined_text, reasons = combine_inputs(results)
+
+    # --- STEPS 3-5: SCORING PIPELINE (cheapest first, stops once FATAL) ---
+    # One pass builds everything the stages need (lowercase, tokens, emails, URLs...)
+    features = extract_features(combined_text, bundle.tokenizer)
+    ctx = AnalysisContext(features, link=link, explain=explain, bundle=bundle)
+    await analysis_pipeline.run(ctx)
+
+    return finalize_report(ctx, reasons, combined_text, image, document, request_start)
+
+# --- STREAMING ENDPOINT ---
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_analysis(form, request_start):
+    """
+    Same analysis as /analyze, pushed as Server-Sent Events while it runs:
+    one 'input' event per extracted input, each followed by a 'rules' stage
+    event for that input's text alone, then one 'stage' event per scoring
+    stage (rules, link, email, ai) over all inputs, then 'final'.
+    A FATAL hit locks the verdict: later stages are skipped, not awaited,
+    and a FATAL keyword in one input cancels the other's pending OCR/parse.
+    If the client disconnects, the generator is cancelled with whatever is in flight.
+    """
+    try:
+        image, document, link, explain = read_request_fields(form)
+        model_registry.maybe_reload()
+        bundle = model_registry.active  # Pinned for the whole stream
+
+        print("\n" + "="*40)
+        print(f"📡 NEW STREAMING ANALYSIS AT {time.strftime('%H:%M:%S')}")
+        print("="*40)
+        yield sse("start", {"inputs": [name for name, f in (("image", image), ("document", document)) if f]})
+
+        results = {}
+        early_score = 0
+        early_reasons = []
+        inputs = iter_inputs(image, document)
+        try:
+            async for name, text, reason in inputs:
+                results[name] = (text, reason)
+                yield sse("input", {"input": name, "ok": bool(text), "characters": len(text or "")})
+                if not text:
+                    continue
+                # Rules are cheap: judge each input as soon as it arrives instead of waiting for the slowest
+                kw_score, kw_reasons = scan_for_keywords(text, None, bundle.keywords)
+                early_score = max(early_score, kw_score)
+                early_reasons.extend(kw_reasons)
+                label, color = verdict_for(early_score)
+                yield sse("stage", {
+                    "stage": "rules",
+                    "input": name,
+                    "score": int(early_score),
+                    "label": label,
+                    "color": color,
+                    "reasons": [r for t, r in results.values() if t] + early_reasons,
+                    "final": verdict_locked(early_score),
+                })
+                if verdict_locked(early_score):
+                    break
+        finally:
+            await inputs.aclose()  # Cancels the OCR/parse still running, if the verdict is already locked
+        for name, upload in (("image", image), ("document", document)):
+            if upload and name not in results:
+                print(f"   ⏭️ Cancelled {name} processing (verdict locked).")
+                yield sse("input", {"input": name, "ok": False, "characters": 0, "cancelled": True})
+
+        combined_text, reasons = combine_inputs(results)
+        features = extract_features(combined_text, bundle.tokenizer)
+        ctx = AnalysisContext(features, link=link, explain=explain, bundle=bundle)
+        async for stage in analysis_pipeline.iter_stages(ctx):
+            label, color = verdict_for(ctx.final_score)
+            yield sse("stage", {
+                "stage": stage,
+                "score": int(ctx.final_score),
+                "label": label,
+                "color": color,
+                "reasons": reasons + ctx.reasons,
+                "final": ctx.verdict_locked,
+            })
+
+        yield sse("final", finalize_report(ctx, reasons, combined_text, image, document, request_start))
+    # Headers (200) are already sent, so failures become a last 'error' event
+    # carrying the status /analyze would have returned
+    except (OCRBusy, StageBusy) as e:
+        print(f"⛔ OVERLOADED: {e}")
+        yield sse("error", {"status": 503, "detail": "Server is busy, please retry shortly.",
+                            "retry_after": int(RETRY_AFTER_SECONDS)})
+    except Exception as e:
+        print(f"❌ Streaming analysis failed: {e}")
+        metrics.incr("stream_errors")
+        yield sse("error", {"status": 500, "detail": "Analysis failed."})
+    finally:
+        form.close()
+
+@app.post("/analyze/stream")
+async def analyze_evidence_stream(request: Request):
+    request_start = time.perf_counter()
+    admit(executors, ["dns", "predict"])
+    form = await read_bounded_form(request)
+    try:
+        if form.files.get("document") or form.files.get("image"):
+            admit(executors, ["parse"])
+    except StageBusy:
+        form.close()
+        raise
+    # The generator owns the spooled files from here and closes them when done
+    return StreamingResponse(
+        stream_analysis(form, request_start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
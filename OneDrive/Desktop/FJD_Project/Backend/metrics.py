@@ -0,0 +1,71 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class Metrics:
+    """
+    Tiny in-process metrics registry (counters + latency timers).
+    Timers keep a rolling window of samples so /metrics can report percentiles
+    without pulling in a Prometheus client.
+    """
+
+    def __init__(self, window=2048):
+        self._lock = threading.Lock()
+        self._window = window
+        self._counters = {}
+        self._timers = {}
+        self._gauges = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, ms):
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = {"count": 0, "total": 0.0, "samples": deque(maxlen=self._window)}
+            timer["count"] += 1
+            timer["total"] += ms
+            timer["samples"].append(ms)
+
+    def reset(self):
+        """Drops counters and timers (e.g. after a load test's warm-up). Gauges hold current state and stay."""
+        with self._lock:
+            self._counters = {}
+            self._timers = {}
+
+    def count(self, name):
+        """Current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def mean(self, name):
+        """Average of a timer in ms (0.0 if never observed)."""
+        with self._lock:
+            timer = self._timers.get(name)
+            return timer["total"] / timer["count"] if timer else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            timers = {}
+            for name, timer in self._timers.items():
+                samples = np.fromiter(timer["samples"], dtype=np.float64)
+                p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if samples.size else (0.0, 0.0, 0.0)
+                timers[name] = {
+                    "count": timer["count"],
+                    "mean_ms": round(timer["total"] / timer["count"], 3),
+                    "p50_ms": round(float(p50), 3),
+                    "p95_ms": round(float(p95), 3),
+                    "p99_ms": round(float(p99), 3),
+                }
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges), "timers": timers}
+
+
+metrics = Metrics()
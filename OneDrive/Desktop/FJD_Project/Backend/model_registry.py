@@ -0,0 +1,356 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+
+import numpy as np
+
+from brain_variants import load_brain, variant_path
+from explainer import TokenSaliency
+from metrics import metrics
+
+# Versioned brain + tokenizer + keyword lists, swappable without a restart.
+#
+#   models/
+#     ACTIVE                  <- name of the version every worker should serve
+#     2024-06-01/
+#       fjd_deep_brain.h5     (+ brain_variants/*.tflite for FJD_BRAIN_VARIANT)
+#       tokenizer.pickle
+#       keywords.json         (optional: {"fatal": [...], "suspicious": [...], "whitelist": [...]})
+#
+# "builtin" is the legacy layout: the brain and tokenizer next to main.py and
+# the keyword lists in main.py. Each worker polls ACTIVE (like the domain
+# lists), loads a new version on a background thread, warms it up, checks it
+# against the live version on PARITY_PROBES and only then swaps it in.
+# Requests hold on to the bundle they started with, so in-flight requests
+# finish on the old version.
+
+BUILTIN_VERSION = "builtin"
+BRAIN_FILE = "fjd_deep_brain.h5"
+TOKENIZER_FILE = "tokenizer.pickle"
+KEYWORDS_FILE = "keywords.json"
+# Version names are directory names under models/: no separators, no "." or ".."
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+# Parity smoke test: the candidate must agree with the live brain on most of
+# these (score > 0.5 or not) before it is allowed to serve traffic
+PARITY_PROBES = [
+    ("Kindly deposit the refundable security fee of Rs 2000 to confirm your job offer.", 1),
+    ("Pay the registration fee on WhatsApp and start earning from home today.", 1),
+    ("Congratulations! You are selected. Send your bank details and Aadhaar to HR on Telegram.", 1),
+    ("Purchase equipment from our vendor and we will reimburse you with your first cheque.", 1),
+    ("Thank you for interviewing with us. Your offer letter is attached, please review and sign.", 0),
+    ("Your onboarding is scheduled for Monday at 10am. Please bring a government ID.", 0),
+    ("We would like to invite you for a second round technical interview next week.", 0),
+    ("Please complete the background check through our screening partner HireRight.", 0),
+]
+
+
+class KeywordLists:
+    """The rule-based scan's regex lists, compiled once per version."""
+
+    def __init__(self, fatal, suspicious, whitelist):
+        self.fatal = list(fatal)
+        self.suspicious = list(suspicious)
+        self.whitelist = list(whitelist)
+        # Compiling up front also rejects a broken keywords.json before it goes live
+        self.fatal_compiled = [(p, re.compile(p)) for p in self.fatal]
+        self.suspicious_compiled = [(p, re.compile(p)) for p in self.suspicious]
+
+    @classmethod
+    def from_file(cls, path, defaults):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            data.get("fatal", defaults.fatal),
+            data.get("suspicious", defaults.suspicious),
+            data.get("whitelist", defaults.whitelist),
+        )
+
+    def to_dict(self):
+        return {"fatal": self.fatal, "suspicious": self.suspicious, "whitelist": self.whitelist}
+
+
+class ModelBundle:
+    """Everything one version serves with. Never mutated after it goes live."""
+
+    def __init__(self, version, model, tokenizer, keywords, max_length, fingerprint=""):
+        self.version = version
+        self.model = model
+        self.tokenizer = tokenizer
+        self.keywords = keywords
+        self.max_length = max_length
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+        # The saliency table is built by ModelRegistry.warm_up, before the bundle serves traffic
+        self.explainer = TokenSaliency(model, tokenizer, max_length) if model and tokenizer else None
+
+    @property
+    def label(self):
+        return f"{self.version}@{self.fingerprint}" if self.fingerprint else self.version
+
+    def encode(self, texts, padding="post", truncating="post"):
+        from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+        seq = self.tokenizer.texts_to_sequences(texts)
+        return pad_sequences(seq, maxlen=self.max_length, padding=padding, truncating=truncating)
+
+
+def _fingerprint(paths, keywords):
+    digest = hashlib.blake2b(digest_size=4)
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    digest.update(json.dumps(keywords.to_dict(), sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Holds the live ModelBundle. `active` is a plain attribute read, so
+    swapping is one reference assignment; readers never take a lock.
+    """
+
+    def __init__(self, default_keywords, max_length, directory="models", variant="float32",
+                 num_threads=None, check_interval=30.0, min_agreement=0.75, build_explainer=True):
+        self.default_keywords = default_keywords
+        self.max_length = max_length
+        self.directory = directory
+        self.variant = variant
+        self.num_threads = num_threads
+        self.check_interval = check_interval
+        self.min_agreement = min_agreement
+        self.build_explainer = build_explainer
+        self.active = None
+        self.loading = None
+        self.last_error = None
+        self._failed_stamp = None  # ACTIVE file (inode, mtime) whose version failed to load
+        self._preloaded = None  # (version, tokenizer, keywords) from preload()
+        self.history = []  # (label, activated_at) of every version served, newest last
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- LOADING ---
+    @staticmethod
+    def check_version(version):
+        """Raises ValueError unless version is a plain directory name (it comes from ACTIVE or an HTTP body)."""
+        if not VERSION_PATTERN.match(version) or version in (".", ".."):
+            raise ValueError(f"Invalid model version name: {version!r}")
+        return version
+
+    def version_dir(self, version):
+        if version == BUILTIN_VERSION:
+            return "."
+        return os.path.join(self.directory, self.check_version(version))
+
+    def _active_stamp(self):
+        """Identifies the current ACTIVE file: publish() replaces it, so a re-publish changes the stamp."""
+        try:
+            stat = os.stat(os.path.join(self.directory, "ACTIVE"))
+            return stat.st_ino, stat.st_mtime_ns
+        except FileNotFoundError:
+            return 0, 0  # No ACTIVE (builtin): still a stamp, so a broken builtin is not retried either
+
+    def requested_version(self):
+        """The version named in models/ACTIVE, or builtin when there is none."""
+        try:
+            with open(os.path.join(self.directory, "ACTIVE"), encoding="utf-8") as f:
+                return f.read().strip() or BUILTIN_VERSION
+        except FileNotFoundError:
+            return BUILTIN_VERSION
+
+    def _paths(self, version):
+        """(brain, brain_variants dir, tokenizer, keywords) paths of a version."""
+        root = self.version_dir(version)
+        if version == BUILTIN_VERSION:
+            return BRAIN_FILE, os.path.join(root, "brain_variants"), TOKENIZER_FILE, None
+        return (os.path.join(root, BRAIN_FILE), os.path.join(root, "brain_variants"),
+                os.path.join(root, TOKENIZER_FILE), os.path.join(root, KEYWORDS_FILE))
+
+    def _load_keywords(self, version):
+        keywords_path = self._paths(version)[3]
+        if keywords_path and os.path.exists(keywords_path):
+            return KeywordLists.from_file(keywords_path, self.default_keywords)
+        return self.default_keywords
+
+    def _load_text_side(self, version):
+        """Tokenizer + keyword lists: plain Python objects, no TensorFlow."""
+        with open(self._paths(version)[2], "rb") as handle:
+            tokenizer = pickle.load(handle)
+        return tokenizer, self._load_keywords(version)
+
+    def _fingerprint_of(self, version, keywords):
+        brain_path, variants_dir, tokenizer_path, _ = self._paths(version)
+        model_file = variant_path(self.variant, brain_path, directory=variants_dir)
+        paths = [model_file, tokenizer_path] if os.path.isfile(model_file) else [tokenizer_path]
+        return _fingerprint(paths, keywords)
+
+    def label_of(self, version):
+        """
+        The label load(version) would give, without loading the brain (no
+        TensorFlow): lets a caller pin the exact files before workers start.
+        Raises FileNotFoundError if the brain or tokenizer is missing.
+        """
+        brain_path, variants_dir, tokenizer_path, _ = self._paths(version)
+        model_file = variant_path(self.variant, brain_path, directory=variants_dir)
+        for path in (model_file, tokenizer_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model version '{version}' is missing {path}")
+        fingerprint = self._fingerprint_of(version, self._load_keywords(version))
+        return ModelBundle(version, None, None, None, self.max_length, fingerprint).label
+
+    def preload(self):
+        """
+        Loads the startup version's tokenizer and keyword lists only. Safe in a
+        pre-fork master (no TensorFlow runtime, no threads), so workers share
+        them copy-on-write; the brain itself is loaded by load_initial() in
+        each worker.
+        """
+        version = self.requested_version()
+        try:
+            self._preloaded = (version, *self._load_text_side(version))
+            print(f"✅ Model Registry: Preloaded tokenizer + keywords of '{version}'.")
+        except Exception as e:
+            print(f"⚠️ Model Registry: Could not preload '{version}' ({e}); each worker will load it.")
+
+    def load(self, version):
+        """Builds a bundle for version. Raises if the brain or tokenizer is missing or broken."""
+        brain_path, variants_dir, _, _ = self._paths(version)
+        model = load_brain(self.variant, brain_path, num_threads=self.num_threads, directory=variants_dir)
+        if self._preloaded and self._preloaded[0] == version:
+            _, tokenizer, keywords = self._preloaded
+        else:
+            tokenizer, keywords = self._load_text_side(version)
+        fingerprint = self._fingerprint_of(version, keywords)
+        return ModelBundle(version, model, tokenizer, keywords, self.max_length, fingerprint)
+
+    def warm_up(self, bundle):
+        """
+        First predict traces the graph / allocates tensors and the saliency
+        table takes one batched predict over the vocabulary: pay both before
+        traffic does (also on hot swap, so no explain request builds it).
+        """
+        padded = bundle.encode([text for text, _ in PARITY_PROBES])
+        bundle.model.predict(padded[:1], verbose=0)
+        scores = bundle.model.predict(padded, verbose=0)[:, 0]
+        if self.build_explainer and bundle.explainer:
+            bundle.explainer.build()
+        return scores
+
+    def parity(self, candidate_scores):
+        """
+        Share of PARITY_PROBES on which the candidate and the live brain give
+        the same verdict, plus any hard failure (NaN/out-of-range scores).
+        """
+        if not np.all(np.isfinite(candidate_scores)) or np.any((candidate_scores < 0) | (candidate_scores > 1)):
+            return 0.0, "scores are not probabilities"
+        current = self.active
+        if current is None or current.model is None or current.tokenizer is None:
+            # Nothing live to compare with: fall back to the probes' expected labels
+            expected = np.array([label for _, label in PARITY_PROBES])
+            return float(np.mean((candidate_scores > 0.5) == expected)), None
+        live_scores = current.model.predict(current.encode([text for text, _ in PARITY_PROBES]), verbose=0)[:, 0]
+        return float(np.mean((candidate_scores > 0.5) == (live_scores > 0.5))), None
+
+    def activate(self, bundle):
+        self.active = bundle  # Atomic: new requests see the new bundle, old ones keep theirs
+        self.history.append((bundle.label, time.time()))
+        metrics.incr("model_swaps")
+        print(f"✅ Model Registry: Now serving {bundle.label}.")
+
+    def load_initial(self):
+        """Synchronous load at startup; falls back to builtin if ACTIVE names a broken version."""
+        stamp = self._active_stamp()
+        requested = self.requested_version()
+        for version in dict.fromkeys([requested, BUILTIN_VERSION]):
+            try:
+                bundle = self.load(version)
+                self.warm_up(bundle)
+                self.activate(bundle)
+                self._preloaded = None  # Later loads re-read the files (they may have changed)
+                return bundle
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                if version == requested:
+                    self._failed_stamp = stamp  # maybe_reload must not retry it every interval
+                print(f"❌ CRITICAL: Model version '{version}' failed to load: {e}")
+        # Keep serving the rule-based stages with no brain
+        self._preloaded = None
+        self.active = ModelBundle("none", None, None, self.default_keywords, self.max_length)
+        return self.active
+
+    # --- HOT SWAP ---
+    def _load_and_swap(self, version, stamp=None):
+        start = time.perf_counter()
+        try:
+            print(f"🔄 Model Registry: Loading '{version}' in the background...")
+            bundle = self.load(version)
+            scores = self.warm_up(bundle)
+            agreement, failure = self.parity(scores)
+            if failure or agreement < self.min_agreement:
+                raise ValueError(f"parity check failed ({failure or f'{agreement:.0%} agreement'}, "
+                                 f"need {self.min_agreement:.0%})")
+            print(f"   -> Parity: {agreement:.0%} agreement with the live version.")
+            self.activate(bundle)
+            self.last_error = None
+            self._failed_stamp = None
+        except Exception as e:
+            metrics.incr("model_swap_failed")
+            self.last_error = f"{version}: {e}"
+            self._failed_stamp = stamp
+            print(f"❌ Model Registry: Keeping {self.active.label if self.active else 'no model'}: {e}")
+        finally:
+            metrics.observe("model_load", (time.perf_counter() - start) * 1000)
+            with self._lock:
+                self.loading = None
+
+    def request(self, version, stamp=None):
+        """Starts loading version unless it is already live or loading. Returns True if started."""
+        with self._lock:
+            if self.loading or (self.active and self.active.version == version):
+                return False
+            self.loading = version
+        threading.Thread(target=self._load_and_swap, args=(version, stamp), name="model-loader", daemon=True).start()
+        return True
+
+    def maybe_reload(self):
+        """Checks models/ACTIVE at most every check_interval seconds (each worker does its own swap)."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        stamp = self._active_stamp()
+        if stamp == self._failed_stamp:
+            return  # Don't reload a broken version every interval; publish it again to retry
+        self.request(self.requested_version(), stamp)
+
+    def publish(self, version):
+        """
+        Points every worker at version by rewriting models/ACTIVE atomically.
+        Raises ValueError for a malformed name, FileNotFoundError for a missing one.
+        """
+        if version != BUILTIN_VERSION and not os.path.isdir(self.version_dir(version)):
+            raise FileNotFoundError(f"No such model version: {version}")
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = os.path.join(self.directory, f".ACTIVE.{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(tmp, os.path.join(self.directory, "ACTIVE"))
+        self.last_error = None
+        self._failed_stamp = None
+        self._checked_at = 0.0
+
+    def status(self):
+        active = self.active
+        return {
+            "active": active.label if active else None,
+            "loaded_at": active.loaded_at if active else None,
+            "requested": self.requested_version(),
+            "loading": self.loading,
+            "last_error": self.last_error,
+            "history": [label for label, _ in self.history[-10:]],
+        }
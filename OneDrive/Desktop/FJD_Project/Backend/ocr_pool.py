@@ -0,0 +1,63 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from metrics import metrics
+
+
+class OCRBusy(Exception):
+    """Raised when the OCR wait queue is full or the wait timed out."""
+
+
+class GeminiPool:
+    """
+    Long-lived Gemini clients (one per model name) behind a concurrency limit.
+    At most max_concurrency OCR requests talk to Gemini at once; up to
+    max_waiting more may queue for a slot. Anything beyond that, or anything
+    that waits longer than wait_timeout, fails fast with OCRBusy so a burst of
+    screenshots cannot eat every threadpool slot.
+    """
+
+    def __init__(self, model_names, client_factory, max_concurrency=4, max_waiting=16, wait_timeout=10.0):
+        self.model_names = list(model_names)
+        self.clients = {name: client_factory(name) for name in self.model_names}
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one OCR slot; records queue time vs service time."""
+        queued_at = time.perf_counter()
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # Free slot: returns without suspending
+        else:
+            if self._waiting >= self.max_waiting:
+                metrics.incr("ocr_rejected")
+                raise OCRBusy(f"OCR queue full ({self._waiting} waiting)")
+
+            self._waiting += 1
+            metrics.gauge("ocr_waiting", self._waiting)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                metrics.incr("ocr_rejected")
+                raise OCRBusy(f"No OCR slot within {self.wait_timeout}s")
+            finally:
+                self._waiting -= 1
+                metrics.gauge("ocr_waiting", self._waiting)
+
+        started_at = time.perf_counter()
+        metrics.observe("ocr_queue", (started_at - queued_at) * 1000)
+        self._in_flight += 1
+        metrics.gauge("ocr_in_flight", self._in_flight)
+        try:
+            yield self.clients
+        finally:
+            self._in_flight -= 1
+            metrics.gauge("ocr_in_flight", self._in_flight)
+            metrics.observe("ocr_service", (time.perf_counter() - started_at) * 1000)
+            self._semaphore.release()
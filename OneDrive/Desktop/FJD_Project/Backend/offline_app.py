@@ -0,0 +1,11 @@
+import os
+
+import fake_services
+
+# The real app with Gemini, DNS and Firestore swapped for local fakes.
+# Run: uvicorn offline_app:app --port 10060 (configure with FJD_FAKE_* env vars)
+fake_services.install()
+# Lets load_test.py drop warm-up traffic from /metrics without an admin token
+os.environ.setdefault("FJD_METRICS_RESET_OPEN", "1")
+
+from main import app  # noqa: E402  (must import after the fakes are installed)
@@ -0,0 +1,164 @@
+import os
+# Set TensorFlow log level to suppress oneDNN warnings
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+import argparse
+import json
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+from brain_variants import VARIANT_DIR, variant_path, load_brain
+from dedup import cluster
+from scoring import MAX_LENGTH, TRUNC_TYPE, PADDING_TYPE
+
+# Builds post-training quantized (and optionally pruned) TFLite variants of
+# fjd_deep_brain.h5 and reports accuracy / size / load time / latency of each
+# against the float32 baseline. main.py picks one with FJD_BRAIN_VARIANT.
+#
+# Accuracy is only meaningful on rows the brain never trained on, and the
+# brain's training split is not reproducible from this repo, so the held-out
+# set is an explicit file. Pruning fine-tunes on a separate --train-data file,
+# minus any row that duplicates a held-out row.
+
+
+def to_padded(tokenizer, texts):
+    seq = tokenizer.texts_to_sequences(texts)
+    return pad_sequences(seq, maxlen=MAX_LENGTH, padding=PADDING_TYPE, truncating=TRUNC_TYPE)
+
+
+def convert(model, out_path, float16=False):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]  # Dynamic-range int8 weights
+    if float16:
+        converter.target_spec.supported_types = [tf.float16]
+    # Recurrent layers may need TF ops that have no TFLite builtin
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"   💾 {out_path} ({os.path.getsize(out_path) / 1024:.0f}KB)")
+
+
+def prune(brain_path, x_train, y_train, epochs, sparsity):
+    """Magnitude pruning + short fine-tune. Needs tensorflow-model-optimization."""
+    try:
+        import tensorflow_model_optimization as tfmot
+    except ImportError:
+        print("   ⚠️ Skipping pruned variant (pip install tensorflow-model-optimization).")
+        return None
+
+    model = tf.keras.models.load_model(brain_path)
+    steps = max(1, int(np.ceil(len(x_train) / 64)) * epochs)
+    schedule = tfmot.sparsity.keras.PolynomialDecay(0.0, sparsity, begin_step=0, end_step=steps)
+    pruned = tfmot.sparsity.keras.prune_low_magnitude(model, pruning_schedule=schedule)
+    pruned.compile(optimizer="adam", loss="binary_crossentropy", metrics=["accuracy"])
+    pruned.fit(x_train, y_train, batch_size=64, epochs=epochs, verbose=0,
+               callbacks=[tfmot.sparsity.keras.UpdatePruningStep()])
+    return tfmot.sparsity.keras.strip_pruning(pruned)
+
+
+def load_labelled(path):
+    data = pd.read_csv(path).dropna(subset=["text", "label"])
+    return data["text"].astype(str).tolist(), data["label"].astype(int).to_numpy()
+
+
+def drop_holdout_overlap(train_texts, train_labels, holdout_texts):
+    """Removes training rows that are exact or near duplicates of a held-out row."""
+    cluster_ids = cluster(list(holdout_texts) + list(train_texts))
+    # Roots are the lowest index in a cluster, so a root < len(holdout) means a held-out twin
+    keep = cluster_ids[len(holdout_texts):] >= len(holdout_texts)
+    return [t for t, k in zip(train_texts, keep) if k], train_labels[keep], int((~keep).sum())
+
+
+def evaluate(variant, brain_path, x_test, y_test, latency_samples):
+    path = variant_path(variant, brain_path)
+    start = time.perf_counter()
+    brain = load_brain(variant, brain_path)
+    load_s = time.perf_counter() - start
+
+    scores = brain.predict(x_test, batch_size=256, verbose=0)[:, 0]
+    accuracy = float(np.mean((scores > 0.5).astype(int) == y_test))
+
+    # Per-request latency: one padded sequence at a time, like /analyze
+    brain.predict(x_test[:1], verbose=0)  # Warm-up
+    timings = []
+    for row in x_test[:latency_samples]:
+        t = time.perf_counter()
+        brain.predict(row[np.newaxis, :], verbose=0)
+        timings.append((time.perf_counter() - t) * 1000)
+
+    return {
+        "variant": variant,
+        "accuracy": round(accuracy, 4),
+        "size_mb": round(os.path.getsize(path) / 1024 / 1024, 3),
+        "load_s": round(load_s, 3),
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and compare quantized variants of the deep brain.")
+    parser.add_argument("--brain", default="fjd_deep_brain.h5")
+    parser.add_argument("--tokenizer", default="tokenizer.pickle")
+    parser.add_argument("--holdout", required=True,
+                        help="Labelled CSV ('text', 'label') the brain never trained on; accuracy is measured here")
+    parser.add_argument("--prune", action="store_true", help="Also build a pruned int8 variant (fine-tunes on --train-data)")
+    parser.add_argument("--train-data", help="Labelled CSV to fine-tune the pruned variant on (required with --prune)")
+    parser.add_argument("--prune-epochs", type=int, default=2)
+    parser.add_argument("--sparsity", type=float, default=0.5)
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--report", default=os.path.join(VARIANT_DIR, "report.json"))
+    args = parser.parse_args()
+    if args.prune and not args.train_data:
+        parser.error("--prune needs --train-data")
+
+    print("⚖️ STARTING BRAIN QUANTIZATION...")
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+
+    with open(args.tokenizer, 'rb') as handle:
+        tokenizer = pickle.load(handle)
+
+    holdout_texts, y_test = load_labelled(args.holdout)
+    x_test = to_padded(tokenizer, holdout_texts)
+    print(f"   🔹 {len(x_test)} held-out samples from {args.holdout}.")
+
+    baseline = tf.keras.models.load_model(args.brain)
+    variants = ["float32"]
+
+    print("   🔧 Building float16 variant...")
+    convert(baseline, variant_path("float16", args.brain), float16=True)
+    variants.append("float16")
+
+    print("   🔧 Building int8 (dynamic range) variant...")
+    convert(baseline, variant_path("int8", args.brain))
+    variants.append("int8")
+
+    if args.prune:
+        train_texts, y_train = load_labelled(args.train_data)
+        train_texts, y_train, overlap = drop_holdout_overlap(train_texts, y_train, holdout_texts)
+        if overlap:
+            print(f"   🔹 Dropped {overlap} fine-tuning rows that duplicate held-out rows.")
+        x_train = to_padded(tokenizer, train_texts)
+        print(f"   ✂️ Pruning to {args.sparsity:.0%} sparsity...")
+        pruned = prune(args.brain, x_train, y_train, args.prune_epochs, args.sparsity)
+        if pruned is not None:
+            convert(pruned, variant_path("int8_pruned", args.brain))
+            variants.append("int8_pruned")
+
+    print("\n📊 VARIANT REPORT (vs float32 baseline):")
+    report = [evaluate(v, args.brain, x_test, y_test, args.latency_samples) for v in variants]
+    base = report[0]
+    print(f"{'variant':<12} {'accuracy':>9} {'Δacc':>7} {'size':>9} {'load':>7} {'p50':>9} {'p95':>9}")
+    for r in report:
+        print(f"{r['variant']:<12} {r['accuracy']:>9.4f} {r['accuracy'] - base['accuracy']:>+7.4f} "
+              f"{r['size_mb']:>7.2f}MB {r['load_s']:>6.2f}s {r['p50_ms']:>7.2f}ms {r['p95_ms']:>7.2f}ms")
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report saved to {args.report}. Deploy with FJD_BRAIN_VARIANT=<variant>.")
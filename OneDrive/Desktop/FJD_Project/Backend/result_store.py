@@ -0,0 +1,183 @@
+import queue
+import threading
+import time
+import uuid
+
+from metrics import metrics
+
+RESULTS_COLLECTION = "analysis_results"
+FIRESTORE_BATCH_LIMIT = 500  # Hard limit of writes per Firestore batch commit
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Records analysis results without touching the request path.
+    submit() is a non-blocking put into a bounded queue; a single background
+    thread drains it and commits Firestore batches whenever max_batch records
+    are waiting or flush_interval seconds have passed.
+
+    If Firestore is slow the queue fills up and the drop policy kicks in
+    ("drop_oldest" keeps the freshest verdicts, "drop_newest" keeps the
+    backlog) - requests never wait for the database.
+    """
+
+    def __init__(self, client, collection=RESULTS_COLLECTION, max_batch=200,
+                 flush_interval=2.0, max_queue=5000, drop_policy="drop_oldest", max_retries=3):
+        if drop_policy not in ("drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.client = client
+        self.collection = collection
+        self.max_batch = min(max_batch, FIRESTORE_BATCH_LIMIT)
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, record):
+        """Never blocks. Returns False if a record had to be dropped."""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            pass
+
+        metrics.incr("results_dropped")
+        if self.drop_policy == "drop_newest":
+            return False
+        try:
+            self._queue.get_nowait()  # Evict the oldest to make room
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            pass
+        return False
+
+    def stop(self, timeout=10.0):
+        """Flushes everything still queued, then stops the writer thread."""
+        if self._thread is None:
+            return
+        # The sentinel must get in even when the queue is full
+        while True:
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                if not self._thread.is_alive():
+                    break
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            batch = []
+            stopping = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if stopping:
+                # Drain whatever is left and commit it in batch-sized chunks
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+                for i in range(0, len(batch), self.max_batch):
+                    self._commit(batch[i:i + self.max_batch])
+                print("✅ Result Store: Flushed and stopped.")
+                return
+
+            if batch:
+                self._commit(batch)
+            metrics.gauge("results_queue_depth", self._queue.qsize())
+
+    def _commit(self, records):
+        delay = 0.5
+        for attempt in range(1, self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                batch = self.client.batch()
+                collection = self.client.collection(self.collection)
+                for record in records:
+                    batch.set(collection.document(), record)
+                batch.commit()
+                metrics.observe("results_commit", (time.perf_counter() - start) * 1000)
+                metrics.incr("results_written", len(records))
+                return True
+            except Exception as e:
+                print(f"⚠️ Result Store: Batch commit failed (attempt {attempt}): {e}")
+                if attempt < self.max_retries:
+                    time.sleep(delay)
+                    delay *= 2
+
+        print(f"❌ Result Store: Dropping {len(records)} results after {self.max_retries} attempts.")
+        metrics.incr("results_dropped", len(records))
+        return False
+
+
+# --- IN-PROCESS FAKE (test mode) ---
+
+class FakeFirestore:
+    """
+    Just enough of the Firestore client for WriteBehindQueue.
+    commit_latency simulates a slow database.
+    """
+
+    def __init__(self, commit_latency=0.0):
+        self.commit_latency = commit_latency
+        self.collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return _FakeCollection(self, name)
+
+    def batch(self):
+        return _FakeBatch(self)
+
+
+class _FakeCollection:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def document(self, doc_id=None):
+        return (self.name, doc_id or uuid.uuid4().hex)
+
+
+class _FakeBatch:
+    def __init__(self, store):
+        self.store = store
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append((ref, dict(data)))
+
+    def commit(self):
+        if self.store.commit_latency:
+            time.sleep(self.store.commit_latency)
+        with self.store._lock:
+            for (collection, doc_id), data in self.writes:
+                self.store.collections.setdefault(collection, {})[doc_id] = data
+        return self.writes
@@ -0,0 +1,128 @@
+from model_registry import KeywordLists
+
+# The scoring rules shared by the API (main.py) and the offline bulk scorer
+# (bulk_score.py). Importing this module loads nothing: no brain, no
+# Firebase, no Gemini. Every function takes log= so bulk runs can stay quiet.
+
+# --- SHARED LIMITS ---
+MAX_LENGTH = 120          # Tokens per padded sequence the brain was trained on
+TRUNC_TYPE = 'post'
+PADDING_TYPE = 'post'
+MAX_TEXT_LINKS = 5        # URLs found in the extracted text that get a reputation check
+FATAL_SCORE = 100         # Once reached nothing downstream can change the verdict
+
+# 🛑 FATAL KEYWORDS (The "Hard Kill" List)
+FATAL_KEYWORDS = [
+    r"kindly\s+deposit", r"send\s+a\s+check", r"purchase\s+equipment",
+    r"buy\s+from\s+vendor", r"western\s+union", r"moneygram",
+    r"clearance\s+fee", r"refundable\s+deposit", r"cost\s+of\s+training"
+]
+
+# ⚠️ SUSPICIOUS KEYWORDS (The "Yellow Flag" List)
+SUSPICIOUS_KEYWORDS = [
+    r"telegram", r"whatsapp", r"signal\s+app", r"verify\s+your\s+identity",
+    r"upload\s+id", r"ssn", r"crypto", r"bitcoin", r"wallet\s+address"
+]
+
+# ✅ WHITELIST (The "Safe Harbor" List)
+WHITELIST_CONTEXT = [
+    "checkr", "sterling", "hireright", "id.me",
+    "background check", "pre-employment screening"
+]
+
+DEFAULT_KEYWORDS = KeywordLists(FATAL_KEYWORDS, SUSPICIOUS_KEYWORDS, WHITELIST_CONTEXT)
+
+
+def quiet(*args, **kwargs):
+    """log= for bulk runs: drops the per-document progress lines."""
+
+
+def scan_for_keywords(text, features=None, keywords=DEFAULT_KEYWORDS, log=print):
+    log("🔎 Running Rule-Based Keyword Scan...")
+    text = features.lower if features is not None else text.lower()
+    triggers = []
+    risk_score = 0
+
+    is_whitelisted = any(safe in text for safe in keywords.whitelist)
+    if is_whitelisted:
+        log("   🛡️ Whitelist Active: Ignoring specific suspicious triggers.")
+
+    for pattern, regex in keywords.fatal_compiled:
+        if regex.search(text):
+            found = pattern.replace(r'', '').strip()
+            log(f"🚨 FATAL TRIGGER FOUND: '{found}'")
+            triggers.append(f"🚨 RED FLAG: Found '{found}'")
+            return 100, triggers
+
+    for pattern, regex in keywords.suspicious_compiled:
+        if regex.search(text):
+            if "verify" in pattern and is_whitelisted:
+                continue
+
+            found = pattern.replace(r'', '').strip()
+            log(f"⚠️ SUSPICIOUS TRIGGER FOUND: '{found}'")
+            triggers.append(f"⚠️ SUSPICIOUS: Found '{found}'")
+            risk_score += 30
+
+    score = min(risk_score, 90)
+    log(f"   -> Rule-Based Score: {score}/100")
+    return score, triggers
+
+
+def verdict_locked(score):
+    """A FATAL score: later (more expensive) checks are skipped."""
+    return score >= FATAL_SCORE
+
+
+def links_to_check(features, link=None):
+    """The submitted link plus the first MAX_TEXT_LINKS URLs in the text, without repeats."""
+    return list(dict.fromkeys(([link] if link else []) + features.urls[:MAX_TEXT_LINKS]))
+
+
+def email_to_validate(features, link=None):
+    """The first email in the text and the features to judge it against (plus the link, if any)."""
+    if not features.emails:
+        return None, features
+    if link:
+        features = features.extended(f" Link provided: {link}")
+    return features.emails[0], features
+
+
+def apply_email_score(final_score, reasons, email_score, email_reasons, log=print):
+    """Folds an EmailValidator score (0-100, higher = more trusted) into the risk score."""
+    if email_score == 0:
+        final_score = max(final_score, 100)
+        reasons.extend(email_reasons)
+        log("   🚨 Email Validator triggered FATAL score.")
+    elif email_score < 50:
+        final_score = max(final_score, 75)
+        reasons.extend(email_reasons)
+    else:
+        reasons.extend(email_reasons)
+    return final_score
+
+
+def apply_ai_score(final_score, reasons, ai_score, log=print):
+    """Folds the brain's 0-100 scam probability into the risk score."""
+    if final_score >= 100:
+        log("   -> Ignored AI score (Rule-Based FATAL trigger active).")
+    elif ai_score > 90:
+        final_score = max(final_score, 95)
+        reasons.append("🤖 AI Model detected high-risk scam patterns.")
+        log("   -> AI boosted score to High Risk.")
+    elif ai_score < 10:
+        if final_score < 50:
+            final_score = 5
+            reasons.append("✅ AI Context Analysis: Safe corporate language detected.")
+            log("   -> AI lowered score (Safe Context).")
+        else:
+            log("   -> AI score low, but existing suspicious rules prevent Safe verdict.")
+    return final_score
+
+
+def verdict_for(score):
+    if score > 80:
+        return "HIGH RISK", "RED"
+    elif score > 40:
+        return "MODERATE", "YELLOW"
+    return "SAFE JOB", "GREEN"
@@ -0,0 +1,75 @@
+import re
+from functools import lru_cache
+
+# Same defaults as keras.preprocessing.text.Tokenizer
+KERAS_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+URL_RE = re.compile(r'(?:https?://|www\.)[^\s<>"\']+', re.IGNORECASE)
+PHONE_RE = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+# "from Amazon" / "at Google" / "joining Microsoft" (case-sensitive: names are capitalised)
+COMPANY_RE = re.compile(r"(from|at|joining)\s+([A-Z][a-zA-Z0-9]+)")
+COMPANY_PRIORITY = {"from": 0, "at": 1, "joining": 2}
+
+
+class TextFeatures:
+    """
+    Everything the scoring stages need from the combined text, computed in
+    one pass up front: the lowercased text, the tokenizer's word list, and
+    the emails, URLs, phone numbers and company names found in it.
+    """
+
+    def __init__(self, text, lower, tokens, emails, urls, phones, company_matches):
+        self.text = text
+        self.lower = lower
+        self.tokens = tokens
+        self.emails = emails
+        self.urls = urls
+        self.phones = phones
+        self.company_matches = company_matches
+        # All "from" hits first, then "at", then "joining" - the order the
+        # validator used to try its three separate patterns in
+        ranked = sorted(company_matches, key=lambda m: COMPANY_PRIORITY[m[0]])
+        self.company_candidates = [name for _, name in ranked]
+
+    def extended(self, extra_text):
+        """Features of text + extra_text, scanning only the extra part (e.g. the link context)."""
+        extra = extract_features(extra_text)
+        return TextFeatures(
+            self.text + extra.text,
+            self.lower + extra.lower,
+            self.tokens + extra.tokens,
+            self.emails + extra.emails,
+            self.urls + extra.urls,
+            self.phones + extra.phones,
+            self.company_matches + extra.company_matches,
+        )
+
+
+@lru_cache(maxsize=8)
+def _split_table(filters, split):
+    return str.maketrans({c: split for c in filters})
+
+
+def extract_features(text, tokenizer=None):
+    lower = text.lower()
+
+    filters = getattr(tokenizer, "filters", KERAS_FILTERS)
+    split = getattr(tokenizer, "split", " ")
+    source = lower if getattr(tokenizer, "lower", True) else text
+    tokens = [t for t in source.translate(_split_table(filters, split)).split(split) if t]
+
+    return TextFeatures(
+        text,
+        lower,
+        tokens,
+        EMAIL_RE.findall(text),
+        [u.rstrip(".,;:!?)") for u in URL_RE.findall(text)],
+        [p.strip() for p in PHONE_RE.findall(text)],
+        COMPANY_RE.findall(text),
+    )
+
+
+def tokens_to_sequences(tokenizer, features):
+    """Keras accepts pre-split token lists, so the text is not re-split here."""
+    return tokenizer.texts_to_sequences([features.tokens])
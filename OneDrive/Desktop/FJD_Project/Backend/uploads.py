@@ -0,0 +1,159 @@
+import os
+from tempfile import SpooledTemporaryFile
+from urllib.parse import parse_qs
+
+try:
+    from python_multipart.multipart import MultipartParser, MultipartState, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, MultipartState, parse_options_header
+
+SPOOL_MEMORY_BYTES = 1024 * 1024  # Parts larger than this roll over to a temp file on disk
+
+# Byte caps, enforced while the body streams in
+MAX_REQUEST_BYTES = int(os.getenv("FJD_MAX_REQUEST_BYTES", str(25 * 1024 * 1024)))
+FIELD_CAPS = {
+    "image": int(os.getenv("FJD_MAX_IMAGE_BYTES", str(10 * 1024 * 1024))),
+    "document": int(os.getenv("FJD_MAX_DOCUMENT_BYTES", str(15 * 1024 * 1024))),
+    "link": 4096,
+    "explain": 16,
+}
+DEFAULT_FIELD_CAP = 1024  # Anything else the client sends
+
+
+class UploadTooLarge(Exception):
+    """Raised as soon as a field or the whole request crosses its cap (-> 413)."""
+
+
+class BadUpload(Exception):
+    """Raised for bodies that are not valid multipart/form-data (-> 400)."""
+
+
+class SpooledUpload:
+    """An uploaded file, already spooled: small ones in memory, big ones on disk."""
+
+    def __init__(self, filename, content_type):
+        self.filename = filename
+        self.content_type = content_type
+        self.file = SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        self.size = 0
+
+    def close(self):
+        self.file.close()
+
+
+class BoundedForm:
+    def __init__(self):
+        self.fields = {}
+        self.files = {}
+
+    def close(self):
+        for upload in self.files.values():
+            upload.close()
+
+
+async def read_bounded_form(request, field_caps=FIELD_CAPS, request_cap=MAX_REQUEST_BYTES):
+    """
+    Streams a multipart body straight into spooled files, counting bytes per
+    field and per request as they arrive. An oversized upload is rejected
+    after at most one extra chunk instead of after it has been buffered.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > request_cap:
+        raise UploadTooLarge(f"Request is {content_length} bytes (limit {request_cap})")
+
+    form = BoundedForm()
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type == b"application/x-www-form-urlencoded" or (not content_type and content_length in (None, "0")):
+        # No files possible: just the small text fields (e.g. a link on its own)
+        body = bytearray()
+        async for chunk in request.stream():
+            body.extend(chunk)
+            if len(body) > DEFAULT_FIELD_CAP + FIELD_CAPS["link"]:
+                raise UploadTooLarge("Form fields too large")
+        for name, values in parse_qs(body.decode("utf-8", "replace")).items():
+            form.fields[name] = values[0][:field_caps.get(name, DEFAULT_FIELD_CAP)]
+        return form
+    if content_type != b"multipart/form-data" or not boundary:
+        raise BadUpload("Expected multipart/form-data")
+
+    state = {"header_field": b"", "header_value": b"", "headers": {}, "name": None, "part": None, "text": None, "size": 0}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["size"] = 0
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        state["name"] = name
+        if b"filename" in options:
+            if name in form.files:
+                # Replacing it would leak the first spool; nothing sends two on purpose
+                raise BadUpload(f"Duplicate file field '{name}'")
+            filename = options[b"filename"].decode("utf-8", "replace")
+            mime = state["headers"].get(b"content-type", b"").decode("latin-1")
+            state["part"] = form.files[name] = SpooledUpload(filename, mime)
+            state["text"] = None
+        else:
+            state["part"] = None
+            state["text"] = bytearray()
+
+    def on_part_data(data, start, end):
+        state["size"] += end - start
+        cap = field_caps.get(state["name"], DEFAULT_FIELD_CAP)
+        if state["size"] > cap:
+            raise UploadTooLarge(f"Field '{state['name']}' exceeds {cap} bytes")
+        if state["part"] is not None:
+            state["part"].file.write(data[start:end])
+        else:
+            state["text"].extend(data[start:end])
+
+    def on_part_end():
+        if state["part"] is not None:
+            state["part"].size = state["size"]
+            state["part"].file.seek(0)
+        else:
+            form.fields[state["name"]] = state["text"].decode("utf-8", "replace")
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > request_cap:
+                raise UploadTooLarge(f"Request exceeds {request_cap} bytes")
+            parser.write(chunk)
+        parser.finalize()
+        # finalize() does not check this itself: a body cut off before the
+        # closing boundary would otherwise be scored on its partial text
+        if parser.state != MultipartState.END:
+            raise BadUpload("Body ended before the closing boundary")
+    except (UploadTooLarge, BadUpload):
+        form.close()
+        raise
+    except Exception as e:
+        form.close()
+        raise BadUpload(f"Malformed multipart body: {e}")
+
+    return form